@@ -0,0 +1,130 @@
+"""
+AutoCad_Buddy - Admission control for conversions
+Conversions are admitted in two steps before any upload is read:
+
+    rate      a token bucket per JWT identity limits how often a user may start conversions
+    capacity  running conversions hold slots weighted by upload size; the total is capped
+              globally and per identity so one user cannot take every slot
+
+State lives in a SQLite database on local disk (see shared_state), so every
+gunicorn worker on the host sees the same buckets and slots. Rejections are immediate: 429 when the
+user is over their rate, 503 when the host is at capacity, both with Retry-After.
+"""
+
+import os
+import math
+import time
+import sqlite3
+import logging
+
+import shared_state
+
+logger = logging.getLogger('AutoCad_Buddy_API')
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS buckets "
+    "(identity TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS slots "
+    "(id INTEGER PRIMARY KEY, identity TEXT NOT NULL, weight INTEGER NOT NULL, "
+    "pid INTEGER NOT NULL, started REAL NOT NULL)"
+)
+# Slots older than this are assumed leaked by a crashed worker
+SLOT_TTL = 60 * 60
+# Retry-After suggested when the host is at capacity
+BUSY_RETRY_AFTER = 5
+
+
+class AdmissionRejected(Exception):
+    """Raised when a conversion is not admitted."""
+
+    def __init__(self, message, status_code, retry_after):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+
+class Slot:
+    """Capacity held by one admitted conversion; release it when the conversion ends."""
+
+    def __init__(self, controller, slot_id, weight):
+        self.controller = controller
+        self.slot_id = slot_id
+        self.weight = weight
+
+    def release(self):
+        if self.slot_id is not None:
+            self.controller._release(self.slot_id)
+            self.slot_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class AdmissionController:
+    """Token buckets and weighted conversion slots shared through a SQLite file."""
+
+    def __init__(self, path, rate=0.2, burst=5, capacity=8, user_capacity=None, weight_unit=4 * 1024 * 1024):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.capacity = capacity
+        self.user_capacity = user_capacity or max(1, capacity // 2)
+        self.weight_unit = weight_unit
+        self.state = shared_state.SharedState(path, SCHEMA)
+
+    def weight(self, size):
+        """Slots needed for an upload of size bytes; at most what one identity may hold."""
+        units = int(math.ceil((size or 0) / self.weight_unit))
+        return min(self.user_capacity, max(1, units))
+
+    def _purge_slots(self, connection, now):
+        for slot_id, pid, started in connection.execute("SELECT id, pid, started FROM slots").fetchall():
+            if started < now - SLOT_TTL or not shared_state.process_alive(pid):
+                connection.execute("DELETE FROM slots WHERE id = ?", (slot_id,))
+
+    def _take_token(self, connection, identity, now):
+        row = connection.execute("SELECT tokens, updated FROM buckets WHERE identity = ?", (identity,)).fetchone()
+        tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+        if tokens < 1:
+            raise AdmissionRejected("Too many conversion requests; slow down", 429, (1 - tokens) / self.rate)
+        connection.execute("INSERT OR REPLACE INTO buckets (identity, tokens, updated) VALUES (?, ?, ?)",
+                           (identity, tokens - 1, now))
+
+    def admit(self, identity, size):
+        """Admit a conversion of size bytes for identity and return its Slot."""
+        weight = self.weight(size)
+        now = time.time()
+        busy = AdmissionRejected("Server is busy", 503, BUSY_RETRY_AFTER)
+        # Rejections keep the purge of leaked slots
+        with self.state.transaction(busy, commit_on=AdmissionRejected) as connection:
+            self._purge_slots(connection, now)
+            # Capacity is checked before a token is spent so a full host does not drain buckets
+            total, mine = connection.execute(
+                "SELECT COALESCE(SUM(weight), 0), COALESCE(SUM(CASE WHEN identity = ? THEN weight END), 0) "
+                "FROM slots", (identity,)).fetchone()
+            if mine + weight > self.user_capacity:
+                raise AdmissionRejected("Too many concurrent conversions for this user", 429, BUSY_RETRY_AFTER)
+            if total + weight > self.capacity:
+                raise AdmissionRejected("Conversion capacity exhausted; try again later", 503, BUSY_RETRY_AFTER)
+            self._take_token(connection, identity, now)
+            cursor = connection.execute(
+                "INSERT INTO slots (identity, weight, pid, started) VALUES (?, ?, ?, ?)",
+                (identity, weight, os.getpid(), now))
+        return Slot(self, cursor.lastrowid, weight)
+
+    def _release(self, slot_id):
+        with self.state.connection() as connection:
+            try:
+                connection.execute("DELETE FROM slots WHERE id = ?", (slot_id,))
+            except sqlite3.OperationalError as e:
+                # Purged later once the slot expires
+                logger.warning(f"Could not release conversion slot {slot_id}: {e}")
+
+    def stats(self):
+        with self.state.connection() as connection:
+            total, running = connection.execute(
+                "SELECT COALESCE(SUM(weight), 0), COUNT(*) FROM slots").fetchone()
+        return {"capacity": self.capacity, "in_use": total, "running": running}
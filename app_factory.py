@@ -0,0 +1,962 @@
+"""
+AutoCad_Buddy - App factory
+Builds the API served by every entry point (app.py, wsgi.py and
+ultra_minimal_app.py), so they share one request path and differ only in
+configuration. create_app() takes a dict overriding default_config(); the
+STORAGE, CONVERTER, VIEWER, DXF_PIPELINE and GEOMETRY_CACHE keys select the
+backends:
+
+    STORAGE         storage.Storage instance for users and models
+    CONVERTER       converter(input_path, stl_path) -> (stl_path, gltf_path) for
+                    non-DXF uploads; runs in the conversion sandbox, so it must
+                    be a picklable module-level function. SVG uploads are first
+                    flattened and simplified to MAX_TRIANGLES_PER_MODEL with
+                    svg_simplify, so CONVERTER receives a bounded drawing
+    VIEWER          viewer(stl_path, viewer_dir, model_id, title) -> HTML path
+    DXF_PIPELINE    'converter' sends DXF uploads to CONVERTER like other files;
+                    'incremental' extrudes them with incremental.convert_revision
+                    (STL only, no glTF), which adds tolerance and base_model_id.
+                    Defaults to 'converter' where a CONVERTER is configured and
+                    to 'incremental' with the placeholder
+    GEOMETRY_CACHE  factory(directory, max_bytes) for the DXF entity mesh cache,
+                    called once in each sandbox worker with GEOMETRY_CACHE_DIR
+                    and GEOMETRY_CACHE_MAX_BYTES; the default stores meshes in
+                    files shared by all workers (None keeps them per process)
+"""
+
+import os
+import html
+import uuid
+import logging
+import traceback
+from datetime import datetime, timedelta
+
+from flask import Blueprint, Flask, Response, current_app, request, jsonify
+from flask_cors import CORS
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from werkzeug.utils import secure_filename
+from werkzeug.wsgi import LimitedStream
+
+import incremental
+import simplify
+import svg_simplify
+import upload_stream
+import upload_sessions
+import artifact_store
+import password_hashing
+import admission
+import sandbox
+import geoip
+import layout
+import profiler
+import equipment
+import storage
+
+logger = logging.getLogger('AutoCad_Buddy_API')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Reported when the client address is private or not in the database
+DEFAULT_LOCATION = {'country': 'US', 'region': 'California', 'city': 'San Francisco', 'equipment_region': 'US'}
+
+
+def placeholder_convert(input_path, output_path):
+    """Write a single-facet STL; used where the full converter is not deployed."""
+    with open(output_path, 'w') as f:
+        f.write("solid placeholder\n")
+        f.write("  facet normal 0 0 0\n")
+        f.write("    outer loop\n")
+        f.write("      vertex 0 0 0\n")
+        f.write("      vertex 1 0 0\n")
+        f.write("      vertex 0 1 0\n")
+        f.write("    endloop\n")
+        f.write("  endfacet\n")
+        f.write("endsolid placeholder\n")
+    return output_path, None
+
+
+VIEWER_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>3D Model Viewer - {title}</title>
+    <script src="https://cdn.jsdelivr.net/npm/three@0.132.2/build/three.min.js"></script>
+    <script src="https://cdn.jsdelivr.net/npm/three@0.132.2/examples/js/controls/OrbitControls.js"></script>
+    <script src="https://cdn.jsdelivr.net/npm/three@0.132.2/examples/js/loaders/STLLoader.js"></script>
+    <style>
+        body {{ margin: 0; overflow: hidden; }}
+        canvas {{ width: 100%; height: 100%; display: block; }}
+        .info {{ position: absolute; top: 10px; left: 10px; background: rgba(0,0,0,0.7); color: white; padding: 10px; border-radius: 5px; }}
+    </style>
+</head>
+<body>
+    <div class="info">
+        <h3>{title}</h3>
+        <p>Use mouse to rotate, scroll to zoom, and right-click to pan.</p>
+    </div>
+    <script>
+        // Set up scene
+        const scene = new THREE.Scene();
+        scene.background = new THREE.Color(0xf0f0f0);
+
+        // Set up camera
+        const camera = new THREE.PerspectiveCamera(75, window.innerWidth / window.innerHeight, 0.1, 1000);
+        camera.position.z = 5;
+
+        // Set up renderer
+        const renderer = new THREE.WebGLRenderer({{ antialias: true }});
+        renderer.setSize(window.innerWidth, window.innerHeight);
+        document.body.appendChild(renderer.domElement);
+
+        // Add lights
+        const ambientLight = new THREE.AmbientLight(0x404040);
+        scene.add(ambientLight);
+
+        const directionalLight1 = new THREE.DirectionalLight(0xffffff, 0.5);
+        directionalLight1.position.set(1, 1, 1);
+        scene.add(directionalLight1);
+
+        const directionalLight2 = new THREE.DirectionalLight(0xffffff, 0.5);
+        directionalLight2.position.set(-1, -1, -1);
+        scene.add(directionalLight2);
+
+        // Add controls
+        const controls = new THREE.OrbitControls(camera, renderer.domElement);
+        controls.enableDamping = true;
+        controls.dampingFactor = 0.25;
+
+        // Load STL model
+        const loader = new THREE.STLLoader();
+        loader.load('/api/download/{model_id}', function(geometry) {{
+            const material = new THREE.MeshPhongMaterial({{ color: 0x3498db, specular: 0x111111, shininess: 200 }});
+            const mesh = new THREE.Mesh(geometry, material);
+
+            // Center model
+            geometry.computeBoundingBox();
+            const center = geometry.boundingBox.getCenter(new THREE.Vector3());
+            mesh.position.x = -center.x;
+            mesh.position.y = -center.y;
+            mesh.position.z = -center.z;
+
+            scene.add(mesh);
+
+            // Adjust camera to fit model
+            const box = new THREE.Box3().setFromObject(mesh);
+            const size = box.getSize(new THREE.Vector3());
+            const maxDim = Math.max(size.x, size.y, size.z);
+            camera.position.z = maxDim * 2.5;
+        }});
+
+        // Handle window resize
+        window.addEventListener('resize', function() {{
+            camera.aspect = window.innerWidth / window.innerHeight;
+            camera.updateProjectionMatrix();
+            renderer.setSize(window.innerWidth, window.innerHeight);
+        }});
+
+        // Animation loop
+        function animate() {{
+            requestAnimationFrame(animate);
+            controls.update();
+            renderer.render(scene, camera);
+        }}
+
+        animate();
+    </script>
+</body>
+</html>
+"""
+
+
+def template_viewer(stl_path, viewer_dir, model_id, title):
+    """Write a three.js viewer page that loads the model from its download URL."""
+    viewer_path = os.path.join(viewer_dir, f"{model_id}.html")
+    with open(viewer_path, 'w') as f:
+        f.write(VIEWER_TEMPLATE.format(title=html.escape(title), model_id=model_id))
+    return viewer_path
+
+
+# Geometry caches of this sandbox worker, by (factory, directory, max_bytes)
+_worker_caches = {}
+
+
+def convert_dxf_revision(cache_spec, *args, **kwargs):
+    """Run incremental.convert_revision in a sandbox worker with the cache described by cache_spec."""
+    if cache_spec is None:
+        return incremental.convert_revision(*args, **kwargs)
+    cache = _worker_caches.get(cache_spec)
+    if cache is None:
+        factory, directory, max_bytes = cache_spec
+        cache = _worker_caches[cache_spec] = factory(directory, max_bytes)
+    return incremental.convert_revision(*args, cache=cache, **kwargs)
+
+
+def convert_svg(converter, input_path, output_path, tolerance, max_triangles):
+    """Simplify an SVG to the triangle budget and convert the simplified copy in a sandbox worker."""
+    simplified_path = f"{os.path.splitext(output_path)[0]}.simplified.svg"
+    svg_simplify.simplify_svg(input_path, simplified_path, tolerance, max_triangles)
+    try:
+        return converter(simplified_path, output_path)
+    finally:
+        os.remove(simplified_path)
+
+
+def default_config():
+    """Settings shared by all entry points, with environment overrides."""
+    return {
+        'JWT_SECRET_KEY': os.environ.get('JWT_SECRET_KEY', 'dev-secret-key'),
+        'JWT_ACCESS_TOKEN_EXPIRES': timedelta(hours=24),
+        'CORS_ORIGINS': os.environ.get('CORS_ALLOWED_ORIGINS', '*'),
+        # Frontend files; with SERVE_INDEX, / and unknown paths serve index.html for client-side routing
+        'STATIC_FOLDER': None,
+        'SERVE_INDEX': False,
+
+        # File uploads
+        'UPLOAD_FOLDER': os.path.join(BASE_DIR, 'uploads'),
+        'ALLOWED_EXTENSIONS': {'svg', 'png', 'jpg', 'jpeg', 'pdf', 'dwg', 'dxf'},
+        'MAX_CONTENT_LENGTH': 16 * 1024 * 1024,  # 16 MB max request (upload or chunk) size
+        'MAX_UPLOAD_SIZE': int(os.environ.get('MAX_UPLOAD_SIZE', 1024 * 1024 * 1024)),  # via chunked uploads
+        # Open chunked uploads reserve their declared size until finalized, deleted or expired
+        'UPLOAD_MAX_SESSIONS': int(os.environ.get('UPLOAD_MAX_SESSIONS', 4)),  # per user
+        'UPLOAD_MAX_RESERVED_BYTES': int(os.environ.get('UPLOAD_MAX_RESERVED_BYTES', 2 * 1024 ** 3)),  # per user
+        'UPLOAD_MAX_TOTAL_RESERVED_BYTES': int(os.environ.get('UPLOAD_MAX_TOTAL_RESERVED_BYTES', 20 * 1024 ** 3)),
+        'MAX_TRIANGLES_PER_MODEL': int(os.environ.get('MAX_TRIANGLES_PER_MODEL', 2000000)),
+
+        # Artifact delivery (see artifact_store for the available modes)
+        'ARTIFACT_DELIVERY': os.environ.get('ARTIFACT_DELIVERY', 'direct'),
+        'ARTIFACT_SIGNED_DELIVERY': os.environ.get('ARTIFACT_SIGNED_DELIVERY', 'direct'),
+        'ARTIFACT_ACCEL_PREFIX': os.environ.get('ARTIFACT_ACCEL_PREFIX', '/protected-artifacts/'),
+        'ARTIFACT_URL_TTL': int(os.environ.get('ARTIFACT_URL_TTL', 300)),
+
+        # Password hashing slots, shared by all workers on the host (see password_hashing)
+        'PASSWORD_HASH_WORKERS': int(os.environ.get('PASSWORD_HASH_WORKERS', password_hashing.MAX_WORKERS)),
+        'PASSWORD_HASH_QUEUE': int(os.environ.get('PASSWORD_HASH_QUEUE', password_hashing.MAX_QUEUE)),
+        'PASSWORD_HASH_TIMEOUT': float(os.environ.get('PASSWORD_HASH_TIMEOUT', password_hashing.TIMEOUT)),
+
+        # Conversion admission control, shared by all workers on the host
+        'CONVERT_RATE': float(os.environ.get('CONVERT_RATE', 0.2)),  # conversions per second per user
+        'CONVERT_BURST': int(os.environ.get('CONVERT_BURST', 5)),
+        'CONVERT_CAPACITY': int(os.environ.get('CONVERT_CAPACITY', 8)),  # slots; one per CONVERT_WEIGHT_UNIT
+        'CONVERT_USER_CAPACITY': int(os.environ.get('CONVERT_USER_CAPACITY', 4)),
+        'CONVERT_WEIGHT_UNIT': int(os.environ.get('CONVERT_WEIGHT_UNIT', 4 * 1024 * 1024)),
+
+        # Sandboxed conversion workers (limits apply per conversion)
+        'CONVERSION_MEMORY_LIMIT': int(os.environ.get('CONVERSION_MEMORY_LIMIT', 2 * 1024 ** 3)),  # bytes
+        'CONVERSION_CPU_LIMIT': int(os.environ.get('CONVERSION_CPU_LIMIT', 120)),  # CPU seconds
+        'CONVERSION_TIMEOUT': int(os.environ.get('CONVERSION_TIMEOUT', 300)),  # wall-clock seconds
+        'CONVERSION_MAX_JOBS': int(os.environ.get('CONVERSION_MAX_JOBS', 20)),  # jobs before a worker is replaced
+
+        # Offline IP geolocation (see geoip for the CSV format)
+        'GEOIP_DATABASE': os.environ.get('GEOIP_DATABASE', os.path.join(BASE_DIR, 'data', 'ip_regions.csv')),
+        'GEOIP_FORMAT': os.environ.get('GEOIP_FORMAT', 'simple'),  # see geoip.FORMATS
+        'TRUSTED_PROXIES': int(os.environ.get('TRUSTED_PROXIES', 1)),  # proxies appending X-Forwarded-For
+
+        # Sampling profiler (opt-in: /api/profile is only served to these users)
+        'PROFILER_USERS': {user for user in os.environ.get('PROFILER_USERS', '').split(',') if user},
+
+        # Backends
+        'STORAGE': None,  # a new storage.MemoryStorage per app
+        'CONVERTER': placeholder_convert,
+        'DXF_PIPELINE': os.environ.get('DXF_PIPELINE'),  # None: see the module docstring
+        'VIEWER': template_viewer,
+        'GEOMETRY_CACHE': incremental.SharedGeometryCache,
+        'GEOMETRY_CACHE_DIR': None,  # UPLOAD_FOLDER/geometry_cache
+        'GEOMETRY_CACHE_MAX_BYTES': int(os.environ.get('GEOMETRY_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+    }
+
+
+class Services:
+    """Backends and shared state of one app, kept in app.extensions['autocad_buddy']."""
+
+    def __init__(self, config):
+        upload_folder = config['UPLOAD_FOLDER']
+        self.storage = config['STORAGE'] or storage.MemoryStorage()
+        self.converter = config['CONVERTER']
+        self.viewer = config['VIEWER']
+        self.geometry_cache = None
+        if config['GEOMETRY_CACHE']:
+            # Passed to sandbox workers, which build the cache from it once
+            self.geometry_cache = (config['GEOMETRY_CACHE'],
+                                   config['GEOMETRY_CACHE_DIR'] or os.path.join(upload_folder, 'geometry_cache'),
+                                   config['GEOMETRY_CACHE_MAX_BYTES'])
+        self.artifacts = artifact_store.LocalArtifactStore(upload_folder)
+        self.password_hashing = password_hashing.HashingLimiter(
+            os.path.join(upload_folder, 'password_hashing.sqlite3'),
+            max_workers=config['PASSWORD_HASH_WORKERS'],
+            max_queue=config['PASSWORD_HASH_QUEUE'],
+            timeout=config['PASSWORD_HASH_TIMEOUT']
+        )
+        self.admission = admission.AdmissionController(
+            os.path.join(upload_folder, 'admission.sqlite3'),
+            rate=config['CONVERT_RATE'],
+            burst=config['CONVERT_BURST'],
+            capacity=config['CONVERT_CAPACITY'],
+            user_capacity=config['CONVERT_USER_CAPACITY'],
+            weight_unit=config['CONVERT_WEIGHT_UNIT']
+        )
+        self.conversions = sandbox.ConversionSandbox(
+            memory_limit=config['CONVERSION_MEMORY_LIMIT'],
+            cpu_limit=config['CONVERSION_CPU_LIMIT'],
+            timeout=config['CONVERSION_TIMEOUT'],
+            max_jobs=config['CONVERSION_MAX_JOBS']
+        )
+        self.geo_database = geoip.GeoIPDatabase(config['GEOIP_DATABASE'], config['GEOIP_FORMAT'])
+
+
+def create_app(config=None):
+    """Build the API app from default_config() updated with config."""
+    settings = default_config()
+    settings.update(config or {})
+    if settings['DXF_PIPELINE'] is None:
+        settings['DXF_PIPELINE'] = 'incremental' if settings['CONVERTER'] is placeholder_convert else 'converter'
+    if settings['DXF_PIPELINE'] not in ('converter', 'incremental'):
+        raise ValueError(f"DXF_PIPELINE must be 'converter' or 'incremental', not {settings['DXF_PIPELINE']!r}")
+    for key in ('ARTIFACT_DELIVERY', 'ARTIFACT_SIGNED_DELIVERY'):
+        if settings[key] not in artifact_store.DELIVERY_MODES:
+            raise ValueError(f"{key} must be one of {', '.join(artifact_store.DELIVERY_MODES)}, not {settings[key]!r}")
+
+    app = Flask(__name__, static_folder=settings['STATIC_FOLDER'], static_url_path='')
+    app.config.update(settings)
+    # Stream uploads to disk with content sniffing instead of spooling them first
+    app.request_class = upload_stream.StreamingUploadRequest
+    # Flask-CORS answers preflight OPTIONS requests for every route
+    CORS(app, origins=app.config['CORS_ORIGINS'])
+    JWTManager(app)
+
+    if sandbox.in_worker():
+        # Entry points such as `python app.py` build their app at import time, and spawned
+        # sandbox workers import them again; the workers only need their functions
+        return app
+
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    app.extensions['autocad_buddy'] = Services(app.config)
+    # Before the first request, so no worker stalls on it; gunicorn --preload loads it once for all workers
+    app.extensions['autocad_buddy'].geo_database.load()
+
+    if app.config['PROFILER_USERS']:
+        profiler.install(app)
+
+    app.register_blueprint(api)
+
+    if app.config['SERVE_INDEX']:
+        app.add_url_rule('/', 'index', lambda: app.send_static_file('index.html'))
+        # Unknown paths serve the index page for client-side routing
+        app.register_error_handler(404, lambda e: app.send_static_file('index.html'))
+    else:
+        app.add_url_rule('/', 'index', lambda: (jsonify({'message': 'AutoCad_Buddy API is running'}), 200))
+
+    return app
+
+
+api = Blueprint('api', __name__)
+
+
+def services():
+    """Services of the current app."""
+    return current_app.extensions['autocad_buddy']
+
+
+def allowed_file(filename):
+    """Check if file has an allowed extension."""
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+
+
+def file_type_error():
+    allowed = ', '.join(sorted(current_app.config['ALLOWED_EXTENSIONS']))
+    return jsonify({'error': f"File type not allowed. Allowed types: {allowed}"}), 400
+
+
+def current_user():
+    """User record of the JWT identity, or None if it is not registered."""
+    return services().storage.get_user(get_jwt_identity())
+
+
+def public_user(user):
+    """User fields returned to clients, with their models in the public_model shape."""
+    models = [public_model(model) for model in services().storage.user_models(user['email'])]
+    return {'id': user['id'], 'email': user['email'], 'name': user['name'], 'models': models}
+
+
+def public_model(model):
+    """Model fields returned to clients; server paths and entity hashes stay private."""
+    return {
+        'id': model['id'],
+        'filename': model['filename'],
+        'created_at': model['created_at'],
+        'base_model_id': model['base_model_id'],
+        'viewer_url': model['viewer_url'],
+        'download_url': model['download_url']
+    }
+
+
+@api.route('/api/register', methods=['POST'])
+def register():
+    """Register a new user."""
+    data = request.get_json(silent=True)
+
+    if not data or not data.get('email') or not data.get('password'):
+        return jsonify({'error': 'Email and password are required'}), 400
+
+    email = data['email']
+    if services().storage.get_user(email):
+        return jsonify({'error': 'Email already registered'}), 400
+
+    # Hashing slots are limited host-wide; bursts are rejected instead of queued forever
+    try:
+        password_hash = services().password_hashing.generate_password_hash(data['password'])
+    except password_hashing.HashingBusy as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': str(e.retry_after)}
+
+    user = {
+        'id': str(uuid.uuid4()),
+        'email': email,
+        'password_hash': password_hash,
+        'name': data.get('name', ''),
+        'created_at': datetime.now().isoformat(),
+        'models': []
+    }
+    # Registered concurrently while this one was hashing
+    if not services().storage.add_user(user):
+        return jsonify({'error': 'Email already registered'}), 400
+
+    return jsonify({
+        'message': 'User registered successfully',
+        'access_token': create_access_token(identity=email),
+        'user': public_user(user)
+    }), 201
+
+
+@api.route('/api/login', methods=['POST'])
+def login():
+    """Login a user."""
+    data = request.get_json(silent=True)
+
+    if not data or not data.get('email') or not data.get('password'):
+        return jsonify({'error': 'Email and password are required'}), 400
+
+    user = services().storage.get_user(data['email'])
+    if not user:
+        return jsonify({'error': 'Invalid email or password'}), 401
+
+    try:
+        password_valid = services().password_hashing.check_password_hash(user['password_hash'], data['password'])
+    except password_hashing.HashingBusy as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': str(e.retry_after)}
+
+    if not password_valid:
+        return jsonify({'error': 'Invalid email or password'}), 401
+
+    return jsonify({
+        'message': 'Login successful',
+        'access_token': create_access_token(identity=user['email']),
+        'user': public_user(user)
+    }), 200
+
+
+@api.route('/api/user', methods=['GET'])
+@jwt_required()
+def get_user():
+    """Get user information with a summary of their models."""
+    user = current_user()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    return jsonify(public_user(user)), 200
+
+
+def is_dxf(filename):
+    return filename.lower().endswith('.dxf')
+
+
+def is_svg(filename):
+    return filename.lower().endswith('.svg')
+
+
+def is_incremental(filename):
+    """Whether an upload goes through the incremental DXF pipeline rather than CONVERTER."""
+    return is_dxf(filename) and current_app.config['DXF_PIPELINE'] == 'incremental'
+
+
+def parse_conversion_options(values, user, filename):
+    """Validate conversion options for an upload; return (tolerance, base_model, error_response)."""
+    # Simplification exists for the incremental DXF pipeline and SVG outlines, incremental
+    # reconversion only for the former; CONVERTER would silently ignore them
+    if is_incremental(filename):
+        unsupported = ()
+    elif is_svg(filename):
+        unsupported = ('base_model_id',)
+    else:
+        unsupported = ('tolerance', 'base_model_id')
+    for option in unsupported:
+        if values.get(option) not in (None, ''):
+            reason = "is not enabled on this server" if is_dxf(filename) else "is not supported for this file type"
+            return None, None, (jsonify({'error': f"{option} {reason}"}), 400)
+
+    # Simplification tolerance for 2D outlines, in drawing units
+    try:
+        tolerance = float(values.get('tolerance') or 0.0)
+    except (TypeError, ValueError):
+        tolerance = -1
+    if tolerance < 0:
+        return None, None, (jsonify({'error': 'Tolerance must be a non-negative number'}), 400)
+
+    # Optional previous revision of the same drawing for incremental reconversion
+    base_model = None
+    if values.get('base_model_id'):
+        base_model = services().storage.get_model(values['base_model_id'])
+        if not base_model or base_model['user_id'] != user['id']:
+            return None, None, (jsonify({'error': 'Base model not found'}), 404)
+        if not base_model.get('entity_hashes'):
+            return None, None, (jsonify({'error': 'Base model does not support incremental reconversion'}), 400)
+
+    return tolerance, base_model, None
+
+
+def admit_conversion(user, size):
+    """Reserve conversion capacity; return (slot, error_response)."""
+    try:
+        return services().admission.admit(user['email'], size), None
+    except admission.AdmissionRejected as e:
+        return None, (jsonify({'error': str(e)}), e.status_code, {'Retry-After': str(e.retry_after)})
+
+
+def convert_saved_file(user, model_id, filename, file_path, file_size, file_sha256, tolerance, base_model):
+    """Convert an uploaded file that is already stored at file_path."""
+    svc = services()
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    try:
+        stl_path = os.path.join(upload_folder, f"{model_id}.stl")
+        gltf_path = None
+        entity_hashes = None
+        incremental_stats = None
+        with profiler.stage('convert'):
+            if is_incremental(filename):
+                # DXF entities are meshed individually so later revisions can reuse them
+                base_hashes = base_model['entity_hashes'] if base_model else None
+                stl_path, entity_hashes, incremental_stats = svc.conversions.run(
+                    convert_dxf_revision, svc.geometry_cache, file_path, stl_path, base_hashes,
+                    tolerance=tolerance, max_triangles=current_app.config['MAX_TRIANGLES_PER_MODEL'])
+            else:
+                if is_svg(filename):
+                    # SVG outlines are simplified to the budget before the converter sees them
+                    stl_path, gltf_path = svc.conversions.run(
+                        convert_svg, svc.converter, file_path, stl_path, tolerance,
+                        current_app.config['MAX_TRIANGLES_PER_MODEL'])
+                else:
+                    # Scanned rasters, PDFs and DWGs only have outlines once the converter has
+                    # traced or read them, so they are bounded by the sandbox limits and the count below
+                    stl_path, gltf_path = svc.conversions.run(svc.converter, file_path, stl_path)
+                # The converter cannot simplify to a budget; reject output that exceeds it
+                triangles = incremental.count_stl_triangles(stl_path)
+                if triangles > current_app.config['MAX_TRIANGLES_PER_MODEL']:
+                    os.remove(stl_path)
+                    raise simplify.TriangleBudgetExceeded(
+                        f"Model has {triangles} triangles, exceeding the budget of "
+                        f"{current_app.config['MAX_TRIANGLES_PER_MODEL']}")
+
+        viewer_dir = os.path.join(upload_folder, 'viewers')
+        os.makedirs(viewer_dir, exist_ok=True)
+        with profiler.stage('viewer'):
+            viewer_path = svc.viewer(stl_path, viewer_dir, model_id, filename)
+
+        # Register the outputs with the artifact store so downloads are a key lookup
+        with profiler.stage('store'):
+            model_key = svc.artifacts.put(f"{model_id}.stl", stl_path)
+            viewer_key = svc.artifacts.put(f"viewers/{os.path.basename(viewer_path)}", viewer_path)
+
+        model = {
+            'id': model_id,
+            'user_id': user['id'],
+            'filename': filename,
+            'original_path': file_path,
+            'original_size': file_size,
+            'original_sha256': file_sha256,
+            'model_key': model_key,
+            'gltf_path': gltf_path,
+            'viewer_key': viewer_key,
+            'entity_hashes': entity_hashes,
+            'base_model_id': base_model['id'] if base_model else None,
+            'created_at': datetime.now().isoformat(),
+            'viewer_url': f"/api/viewer/{model_id}",
+            'download_url': f"/api/download/{model_id}"
+        }
+        svc.storage.add_model(model, user['email'])
+
+        response = {
+            'success': True,
+            'model_id': model_id,
+            'filename': filename,
+            'viewer_url': model['viewer_url'],
+            'download_url': model['download_url']
+        }
+        if incremental_stats:
+            response['tolerance'] = incremental_stats['tolerance']
+        if base_model:
+            response['incremental'] = dict(incremental_stats, base_model_id=base_model['id'])
+        return jsonify(response), 200
+
+    except simplify.TriangleBudgetExceeded as e:
+        return jsonify({'error': str(e)}), 400
+
+    except sandbox.ConversionFailed as e:
+        logger.warning(f"Conversion of {file_path} failed: {e.code}: {e}")
+        return jsonify({'error': str(e), 'code': e.code}), e.status_code
+
+    except Exception as e:
+        logger.error(f"Error converting file: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+
+@api.route('/api/convert', methods=['POST'])
+@jwt_required()
+def convert_file():
+    """Convert a 2D file to 3D."""
+    user = current_user()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    # Admission is decided from the declared body size, before the upload is read; a chunked
+    # body declares none and may be as large as MAX_CONTENT_LENGTH
+    size = request.content_length
+    if size is None:
+        size = current_app.config['MAX_CONTENT_LENGTH']
+    slot, error = admit_conversion(user, size)
+    if error:
+        return error
+
+    with slot:
+        # Parsing the body streams the file to disk and rejects it on a content mismatch
+        try:
+            with profiler.stage('upload'):
+                files = request.files
+        except upload_stream.UploadRejected as e:
+            return jsonify({'error': str(e)}), e.status_code
+
+        if 'file' not in files:
+            return jsonify({'error': 'No file part'}), 400
+
+        file = files['file']
+
+        if file.filename == '':
+            return jsonify({'error': 'No selected file'}), 400
+
+        if not allowed_file(file.filename):
+            return file_type_error()
+
+        tolerance, base_model, error = parse_conversion_options(request.form, user, file.filename)
+        if error:
+            return error
+
+        model_id = str(uuid.uuid4())
+        filename = secure_filename(file.filename)
+        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{model_id}_{filename}")
+        try:
+            with profiler.stage('upload'):
+                file_size, file_sha256 = upload_stream.save(file, file_path)
+        except OSError as e:
+            logger.error(f"Error saving upload: {e}")
+            return jsonify({'error': str(e)}), 500
+
+        return convert_saved_file(user, model_id, filename, file_path, file_size, file_sha256,
+                                  tolerance, base_model)
+
+
+# Resumable chunked uploads for files larger than MAX_CONTENT_LENGTH
+@api.route('/api/uploads', methods=['POST'])
+@jwt_required()
+def create_upload():
+    """Start a resumable chunked upload."""
+    user = current_user()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    data = request.get_json(silent=True)
+    if not data or not data.get('filename') or not data.get('sha256') or not isinstance(data.get('size'), int):
+        return jsonify({'error': 'filename, size and sha256 are required'}), 400
+
+    if not allowed_file(data['filename']):
+        return file_type_error()
+
+    max_size = current_app.config['MAX_UPLOAD_SIZE']
+    if not 0 < data['size'] <= max_size:
+        return jsonify({'error': f"File size must be between 1 and {max_size} bytes"}), 413
+
+    config = current_app.config
+    try:
+        session = upload_sessions.create_session(
+            config['UPLOAD_FOLDER'], user['email'], secure_filename(data['filename']),
+            data['size'], data['sha256'],
+            max_sessions=config['UPLOAD_MAX_SESSIONS'],
+            max_owner_bytes=config['UPLOAD_MAX_RESERVED_BYTES'],
+            max_total_bytes=config['UPLOAD_MAX_TOTAL_RESERVED_BYTES'])
+    except upload_sessions.UploadSessionError as e:
+        return jsonify({'error': str(e)}), e.status_code
+
+    return jsonify({
+        'upload_id': session['id'],
+        'offset': 0,
+        'chunk_size': current_app.config['MAX_CONTENT_LENGTH'],
+        'upload_url': f"/api/uploads/{session['id']}"
+    }), 201
+
+
+@api.route('/api/uploads/<upload_id>', methods=['GET'])
+@jwt_required()
+def get_upload(upload_id):
+    """Get the number of bytes received for an upload, to resume it."""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    session = upload_sessions.load_session(upload_folder, upload_id, get_jwt_identity())
+    if not session:
+        return jsonify({'error': 'Upload not found'}), 404
+
+    return jsonify({
+        'upload_id': upload_id,
+        'offset': upload_sessions.current_offset(upload_folder, session),
+        'size': session['size']
+    }), 200
+
+
+@api.route('/api/uploads/<upload_id>', methods=['PUT'])
+@jwt_required()
+def upload_chunk(upload_id):
+    """Append a chunk at the offset given by the Upload-Offset header."""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    session = upload_sessions.load_session(upload_folder, upload_id, get_jwt_identity())
+    if not session:
+        return jsonify({'error': 'Upload not found'}), 404
+
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'Upload-Offset header is required'}), 400
+
+    # Checked here because older Werkzeug versions do not apply MAX_CONTENT_LENGTH to request.stream
+    max_chunk = current_app.config['MAX_CONTENT_LENGTH']
+    if request.content_length is None:
+        return jsonify({'error': 'Content-Length header is required'}), 411
+    if request.content_length > max_chunk:
+        return jsonify({'error': f"Chunks must not exceed {max_chunk} bytes"}), 413
+
+    try:
+        offset = upload_sessions.append_chunk(upload_folder, session, offset,
+                                              LimitedStream(request.stream, request.content_length))
+    except upload_sessions.UploadSessionError as e:
+        return jsonify({'error': str(e), 'offset': e.offset}), e.status_code
+
+    return jsonify({'upload_id': upload_id, 'offset': offset, 'size': session['size']}), 200
+
+
+@api.route('/api/uploads/<upload_id>', methods=['DELETE'])
+@jwt_required()
+def delete_upload(upload_id):
+    """Abandon an upload and release the space it reserved."""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    session = upload_sessions.load_session(upload_folder, upload_id, get_jwt_identity())
+    if not session:
+        return jsonify({'error': 'Upload not found'}), 404
+
+    upload_sessions.delete_session(upload_folder, session)
+    return jsonify({'message': 'Upload deleted'}), 200
+
+
+@api.route('/api/uploads/<upload_id>/finalize', methods=['POST'])
+@jwt_required()
+def finalize_upload(upload_id):
+    """Verify a completed upload and convert it."""
+    user = current_user()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    session = upload_sessions.load_session(upload_folder, upload_id, user['email'])
+    if not session:
+        return jsonify({'error': 'Upload not found'}), 404
+
+    slot, error = admit_conversion(user, session['size'])
+    if error:
+        return error
+
+    with slot:
+        tolerance, base_model, error = parse_conversion_options(request.get_json(silent=True) or {}, user, session['filename'])
+        if error:
+            return error
+
+        model_id = str(uuid.uuid4())
+        filename = session['filename']
+        file_path = os.path.join(upload_folder, f"{model_id}_{filename}")
+        try:
+            with profiler.stage('upload'):
+                file_size, file_sha256 = upload_sessions.finalize_session(upload_folder, session, file_path)
+        except upload_sessions.UploadSessionError as e:
+            return jsonify({'error': str(e), 'offset': e.offset}), e.status_code
+
+        return convert_saved_file(user, model_id, filename, file_path, file_size, file_sha256,
+                                  tolerance, base_model)
+
+
+@api.route('/api/models', methods=['GET'])
+@jwt_required()
+def get_models():
+    """Get user's models."""
+    user = current_user()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    return jsonify([public_model(model) for model in services().storage.user_models(user['email'])]), 200
+
+
+@api.route('/api/viewer/<model_id>', methods=['GET'])
+def get_viewer(model_id):
+    """Get the 3D viewer for a model."""
+    svc = services()
+    model = svc.storage.get_model(model_id)
+    if not model:
+        return jsonify({'error': 'Model not found'}), 404
+
+    return artifact_store.deliver(svc.artifacts, model['viewer_key'], 'text/html')
+
+
+@api.route('/api/download/<model_id>', methods=['GET'])
+def download_model(model_id):
+    """Download a 3D model."""
+    svc = services()
+    model = svc.storage.get_model(model_id)
+    if not model:
+        return jsonify({'error': 'Model not found'}), 404
+
+    return artifact_store.deliver(
+        svc.artifacts, model['model_key'], 'application/octet-stream',
+        as_attachment=True, download_name=f"{os.path.splitext(model['filename'])[0]}.stl")
+
+
+@api.route('/api/artifacts/<path:key>', methods=['GET'])
+def get_artifact(key):
+    """Serve an artifact through a time-limited signed URL."""
+    return artifact_store.deliver_signed(services().artifacts, key)
+
+
+@api.route('/api/equipment/categories', methods=['GET'])
+def get_equipment_categories():
+    """Get equipment categories."""
+    return jsonify(list(equipment.CATALOG.keys())), 200
+
+
+@api.route('/api/equipment/types', methods=['GET'])
+def get_equipment_types():
+    """Get equipment types for a category."""
+    category = request.args.get('category', 'kitchen')
+
+    if category not in equipment.CATALOG:
+        return jsonify({'error': 'Category not found'}), 404
+
+    return jsonify(equipment.CATALOG[category]['types']), 200
+
+
+@api.route('/api/equipment/search', methods=['GET'])
+def search_equipment():
+    """Search for equipment."""
+    category = request.args.get('category', 'kitchen')
+    type_filter = request.args.get('type')
+    # Without an explicit region, show equipment available where the client is
+    region = request.args.get('region') or request_location()['equipment_region']
+
+    if category not in equipment.CATALOG:
+        return jsonify({'error': 'Category not found'}), 404
+
+    if type_filter and type_filter not in equipment.CATALOG[category]['types']:
+        return jsonify({'error': 'Equipment type not found'}), 404
+
+    results = [item for item in equipment.CATALOG[category]['items']
+               if (not type_filter or item['type'] == type_filter) and region in item['regions']]
+
+    return jsonify(results), 200
+
+
+def request_location():
+    """Resolve the location of the current client from its IP address."""
+    address = geoip.client_address(request, current_app.config['TRUSTED_PROXIES'])
+    location = services().geo_database.lookup(address) if address else None
+    if not location:
+        # Unknown or private address
+        return dict(DEFAULT_LOCATION)
+    country, region, city = location
+    return {'country': country, 'region': region, 'city': city, 'equipment_region': geoip.equipment_region(country)}
+
+
+@api.route('/api/location', methods=['GET'])
+def get_user_location():
+    """Get user's location based on IP address."""
+    return jsonify(request_location()), 200
+
+
+@api.route('/api/layout', methods=['POST'])
+@jwt_required()
+def generate_layout():
+    """Lay out catalogue equipment in the room outline of a converted model."""
+    user = current_user()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    data = request.get_json(silent=True) or {}
+    category = data.get('category', 'restaurant')
+    if category not in equipment.CATALOG:
+        return jsonify({'error': 'Category not found'}), 404
+    region = data.get('region') or request_location()['equipment_region']
+
+    try:
+        if data.get('outline'):
+            outline, obstacles = data['outline'], data.get('obstacles') or []
+        else:
+            # Read the room from the uploaded drawing, sandboxed like a conversion
+            model = services().storage.get_model(data.get('model_id'))
+            if not model or model['user_id'] != user['id']:
+                return jsonify({'error': 'Model not found'}), 404
+            if not is_dxf(model['filename']):
+                return jsonify({'error': 'Room outlines can only be read from DXF models; pass an outline'}), 400
+            # Reading a drawing costs as much as converting it, so it takes the same admission
+            slot, error = admit_conversion(user, model.get('original_size'))
+            if error:
+                return error
+            with slot:
+                outline, obstacles = services().conversions.run(layout.room_outline, model['original_path'])
+
+        result = layout.plan_layout(outline, data.get('items') or [], equipment.CATALOG[category]['items'], region,
+                                    obstacles=obstacles, units=data.get('units', 'mm'), seats=data.get('seats'))
+    except layout.LayoutError as e:
+        return jsonify({'error': str(e)}), 400
+    except sandbox.ConversionFailed as e:
+        return jsonify({'error': str(e), 'code': e.code}), e.status_code
+
+    result['region'] = region
+    return jsonify(result), 200
+
+
+@api.route('/api/profile', methods=['GET'])
+@jwt_required()
+def profile_worker():
+    """Sample the stacks of this worker process and its sandbox jobs, collapsed for flamegraphs."""
+    if get_jwt_identity() not in current_app.config['PROFILER_USERS']:
+        return jsonify({'error': 'Not found'}), 404
+
+    seconds = request.args.get('seconds', 10, type=float)
+    rate = request.args.get('rate', 100, type=float)
+    try:
+        stacks, samples = profiler.sample(seconds, rate, all_threads=request.args.get('threads') == 'all')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except profiler.ProfilerBusy as e:
+        return jsonify({'error': str(e)}), 409
+
+    return Response(profiler.collapse(stacks), mimetype='text/plain',
+                    headers={'X-Profile-Samples': str(samples), 'X-Profile-Pid': str(os.getpid())})
+
+
+@api.route('/health', methods=['GET'])
+def health_check():
+    """Health check with the host-wide load of password hashing and conversions."""
+    return jsonify({
+        'status': 'healthy',
+        'password_hashing': services().password_hashing.stats(),
+        'conversions': services().admission.stats()
+    }), 200
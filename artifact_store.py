@@ -0,0 +1,170 @@
+"""
+AutoCad_Buddy - Artifact store and offloaded delivery
+Converted models and viewer pages are addressed by key through an artifact
+store. Downloads are answered according to ARTIFACT_DELIVERY:
+
+    direct            stream the bytes from the worker with send_file
+    x-accel-redirect  hand the transfer to nginx (internal location at ARTIFACT_ACCEL_PREFIX)
+    x-sendfile        hand the transfer to Apache/lighttpd via the file path
+    signed-url        redirect to a time-limited signed URL served by /api/artifacts
+
+With the proxy modes a download costs the worker only a metadata lookup.
+"""
+
+import os
+import hmac
+import time
+import shutil
+import hashlib
+import logging
+import unicodedata
+from urllib.parse import quote
+
+from flask import Response, abort, current_app, redirect, request, send_file
+
+logger = logging.getLogger('AutoCad_Buddy_API')
+
+DELIVERY_MODES = ('direct', 'x-accel-redirect', 'x-sendfile', 'signed-url')
+
+
+class ArtifactStore:
+    """Interface for storing conversion artifacts under string keys."""
+
+    def put(self, key, source_path):
+        """Store the file at source_path under key and return the key."""
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def local_path(self, key):
+        """Filesystem path of the artifact, or None if the backend is not file based."""
+        return None
+
+    def open(self, key):
+        """Open the artifact for reading in binary mode."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+
+class LocalArtifactStore(ArtifactStore):
+    """Artifacts stored as files below a root directory."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def local_path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise ValueError(f"Artifact key escapes the store: {key}")
+        return path
+
+    def put(self, key, source_path):
+        destination = self.local_path(key)
+        if os.path.abspath(source_path) != destination:
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.move(source_path, destination)
+        return key
+
+    def exists(self, key):
+        return os.path.isfile(self.local_path(key))
+
+    def open(self, key):
+        return open(self.local_path(key), 'rb')
+
+    def delete(self, key):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+
+def _signing_key():
+    config = current_app.config
+    return (config.get('ARTIFACT_SIGNING_KEY') or config['JWT_SECRET_KEY']).encode('utf-8')
+
+
+def sign(key, expires, download_name=None):
+    # The download name is signed too, so it cannot be changed or dropped from a URL
+    message = f"{key}:{expires}:{download_name or ''}".encode('utf-8')
+    return hmac.new(_signing_key(), message, hashlib.sha256).hexdigest()
+
+
+def signed_url(key, ttl=None, download_name=None):
+    """Time-limited URL for an artifact, served by the /api/artifacts route."""
+    ttl = ttl or current_app.config.get('ARTIFACT_URL_TTL', 300)
+    expires = int(time.time()) + ttl
+    url = f"/api/artifacts/{quote(key)}?expires={expires}&signature={sign(key, expires, download_name)}"
+    if download_name:
+        url += f"&name={quote(download_name)}"
+    return url
+
+
+def verify_signature(key, expires, signature, download_name=None):
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(sign(key, expires, download_name), signature or '')
+
+
+def _set_attachment(headers, download_name):
+    """Content-Disposition for download_name, quoted the way send_file does it."""
+    try:
+        download_name.encode('ascii')
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        names = {'filename': simple, 'filename*': f"UTF-8''{quote(download_name, safe='!#$&+^`|~')}"}
+    else:
+        names = {'filename': download_name}
+    headers.set('Content-Disposition', 'attachment', **names)
+
+
+def _proxy_response(store, key, mimetype, as_attachment, download_name, mode):
+    response = Response(mimetype=mimetype)
+    if mode == 'x-accel-redirect':
+        prefix = current_app.config.get('ARTIFACT_ACCEL_PREFIX', '/protected-artifacts/')
+        response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(key)
+    else:
+        response.headers['X-Sendfile'] = store.local_path(key)
+    if as_attachment:
+        _set_attachment(response.headers, download_name or os.path.basename(key))
+    return response
+
+
+def deliver(store, key, mimetype, as_attachment=False, download_name=None, mode=None):
+    """Build the response that delivers an artifact according to the configured mode."""
+    mode = mode or current_app.config.get('ARTIFACT_DELIVERY', 'direct')
+    if mode not in DELIVERY_MODES:
+        raise ValueError(f"Unknown ARTIFACT_DELIVERY mode: {mode}")
+    if not store.exists(key):
+        abort(404)
+
+    if mode == 'signed-url':
+        return redirect(signed_url(key, download_name=download_name if as_attachment else None))
+    if mode in ('x-accel-redirect', 'x-sendfile'):
+        return _proxy_response(store, key, mimetype, as_attachment, download_name, mode)
+
+    path = store.local_path(key)
+    source = path if path else store.open(key)
+    return send_file(source, mimetype=mimetype, as_attachment=as_attachment,
+                     download_name=download_name or os.path.basename(key))
+
+
+def deliver_signed(store, key):
+    """Serve a signed artifact URL, offloading to the proxy when one is configured."""
+    download_name = request.args.get('name')
+    if not verify_signature(key, request.args.get('expires'), request.args.get('signature'), download_name):
+        abort(403)
+    mimetype = 'text/html' if key.endswith('.html') else 'application/octet-stream'
+    # Signed URLs still avoid streaming through Python when a proxy can take over
+    inner_mode = current_app.config.get('ARTIFACT_SIGNED_DELIVERY', 'direct')
+    if inner_mode == 'signed-url':
+        inner_mode = 'direct'
+    return deliver(store, key, mimetype, as_attachment=bool(download_name),
+                   download_name=download_name, mode=inner_mode)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+AutoCad_Buddy - Login throughput benchmark
+Fires a burst of concurrent POST /api/login requests and reports logins per
+second, latency percentiles of successful logins, and how many were rejected
+with 429 by the host-wide password hashing limit.
+
+By default the app runs in process behind Flask's test client, once per
+PBKDF2 cost setting. With --url the burst goes to a running server instead,
+e.g. gunicorn with several sync workers, so the limit is exercised across
+processes; the server's own hashing cost applies then.
+
+Usage: python benchmarks/bench_auth.py [--clients 32] [--logins 200] [--iterations 50000 260000]
+       python benchmarks/bench_auth.py --url http://127.0.0.1:5000 [--clients 32] [--logins 200]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+
+from werkzeug import security
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import password_hashing
+from app_factory import create_app, services
+
+EMAIL = 'bench@example.com'
+PASSWORD = 'correct horse battery staple'
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def test_client_poster(app):
+    """post(path, body) -> status through a test client per thread."""
+    local = threading.local()
+
+    def post(path, body):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        return local.client.post(path, json=body).status_code
+    return post
+
+
+def http_poster(url):
+    """post(path, body) -> status against a running server."""
+    def post(path, body):
+        request = urllib.request.Request(url.rstrip('/') + path, data=json.dumps(body).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+    return post
+
+
+def run_burst(post, clients, logins):
+    """Send logins requests from clients threads. Returns (elapsed, latencies, rejected, failed)."""
+    latencies = []
+    counts = {'rejected': 0, 'failed': 0}
+    lock = threading.Lock()
+    remaining = [logins]
+    credentials = {'email': EMAIL, 'password': PASSWORD}
+
+    def client():
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            start = time.perf_counter()
+            status = post('/api/login', credentials)
+            with lock:
+                if status == 200:
+                    latencies.append(time.perf_counter() - start)
+                elif status == 429:
+                    counts['rejected'] += 1
+                else:
+                    counts['failed'] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, counts['rejected'], counts['failed']
+
+
+def report(label, result):
+    elapsed, latencies, rejected, failed = result
+    print(f"{label:>10} {len(latencies) / elapsed:>9.1f} {percentile(latencies, 0.5) * 1000:>9.1f} "
+          f"{percentile(latencies, 0.99) * 1000:>9.1f} {len(latencies):>9} {rejected:>9} {failed:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='Benchmark a running server instead of an in-process app')
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent login clients')
+    parser.add_argument('--logins', type=int, default=200, help='Login attempts per cost setting')
+    parser.add_argument('--iterations', type=int, nargs='+', default=[50000, 150000, 260000, 600000],
+                        help='PBKDF2-SHA256 iteration counts to measure (in-process only)')
+    parser.add_argument('--workers', type=int, default=password_hashing.MAX_WORKERS,
+                        help='Hashing slots (in-process only)')
+    parser.add_argument('--queue', type=int, default=password_hashing.MAX_QUEUE,
+                        help='Hashing queue limit (in-process only)')
+    args = parser.parse_args()
+
+    header = (f"{'iterations':>10} {'logins/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+              f"{'accepted':>9} {'rejected':>9} {'failed':>7}")
+
+    if args.url:
+        post = http_poster(args.url)
+        # Already registered on a second run
+        post('/api/register', {'email': EMAIL, 'password': PASSWORD, 'name': 'Benchmark'})
+        print(f"{args.clients} clients against {args.url}")
+        print(header)
+        report('server', run_burst(post, args.clients, args.logins))
+        return
+
+    print(f"{args.clients} clients, {args.workers} hashing slots, queue limit {args.queue}")
+    print(header)
+    for iterations in args.iterations:
+        with tempfile.TemporaryDirectory() as upload_folder:
+            app = create_app({
+                'UPLOAD_FOLDER': upload_folder,
+                'PASSWORD_HASH_WORKERS': args.workers,
+                'PASSWORD_HASH_QUEUE': args.queue
+            })
+            post = test_client_poster(app)
+            post('/api/register', {'email': EMAIL, 'password': PASSWORD, 'name': 'Benchmark'})
+            with app.app_context():
+                # Store the hash at the cost being measured
+                services().storage.get_user(EMAIL)['password_hash'] = security.generate_password_hash(
+                    PASSWORD, method=f"pbkdf2:sha256:{iterations}")
+            report(str(iterations), run_burst(post, args.clients, args.logins))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+AutoCad_Buddy - Layout benchmark
+Times the equipment layout of restaurants with a given number of seats in a
+rectangular dining hall with a grid of columns, using the shared equipment catalogue.
+
+Usage: python benchmarks/bench_layout.py [--seats 50 100 200 400] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import layout
+import equipment
+
+CATALOG = equipment.CATALOG['restaurant']['items']
+
+ITEMS = [{'type': 'bar', 'count': 3}, {'type': 'serving_station', 'count': 4}]
+
+
+def generate_hall(seats, column=40.0, bay=600.0):
+    """Square hall sized for seats (about 2 m2 per seat) with columns on a bay grid, in cm."""
+    side = max(bay, (seats * 2.0) ** 0.5 * 100.0)
+    outline = [(0.0, 0.0), (side, 0.0), (side, side), (0.0, side)]
+    columns = []
+    x = bay
+    while x < side - column:
+        y = bay
+        while y < side - column:
+            columns.append([(x, y), (x + column, y), (x + column, y + column), (x, y + column)])
+            y += bay
+        x += bay
+    return outline, columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seats', type=int, nargs='+', default=[50, 100, 200, 400], help='Seats to lay out')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'seats':>6} {'hall (m)':>9} {'columns':>8} {'placed seats':>13} {'items':>6} {'time (ms)':>10}")
+    for seats in args.seats:
+        outline, columns = generate_hall(seats)
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = layout.plan_layout(outline, ITEMS, CATALOG, 'US', obstacles=columns, units='cm', seats=seats)
+            best = min(best, time.perf_counter() - start)
+        print(f"{seats:>6} {outline[2][0] / 100:>9.1f} {len(columns):>8} {result['seats']:>13} "
+              f"{len(result['placements']):>6} {best * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
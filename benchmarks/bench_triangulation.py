@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+AutoCad_Buddy - Triangulation benchmark
+Compares the sweep-line triangulator with naive ear clipping on generated
+floor plans: a rectangular hall with a grid of square columns as holes.
+
+Usage: python benchmarks/bench_triangulation.py [--sizes 5 10 20] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import triangulate
+
+
+def generate_plan(columns_x, columns_y, bay=600.0, column=40.0):
+    """Floor plan outline with a columns_x by columns_y grid of column holes."""
+    outer = [(0.0, 0.0), (columns_x * bay, 0.0), (columns_x * bay, columns_y * bay), (0.0, columns_y * bay)]
+    holes = []
+    for i in range(columns_x):
+        for j in range(columns_y):
+            x = i * bay + (bay - column) / 2
+            y = j * bay + (bay - column) / 2
+            holes.append([(x, y), (x + column, y), (x + column, y + column), (x, y + column)])
+    return outer, holes
+
+
+def best_time(func, repeat, *args):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2, 5, 10, 15, 20],
+                        help='Column grid sizes (N gives an N x N grid)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'grid':>7} {'vertices':>9} {'triangles':>10} {'sweep (ms)':>11} {'ear clip (ms)':>14} {'speedup':>8}")
+    for size in args.sizes:
+        outer, holes = generate_plan(size, size)
+        vertices = len(outer) + sum(len(hole) for hole in holes)
+        _, triangles = triangulate.sweep_triangulate(outer, holes)
+        sweep = best_time(triangulate.sweep_triangulate, args.repeat, outer, holes)
+        ear = best_time(triangulate.ear_clip_triangulate, args.repeat, outer, holes)
+        print(f"{size:>3}x{size:<3} {vertices:>9} {len(triangles):>10} {sweep * 1000:>11.1f} "
+              f"{ear * 1000:>14.1f} {ear / sweep:>7.1f}x")
+
+    # Batched small polygons, as produced by a drawing with many hatched rooms
+    rooms = [generate_plan(1, 1, bay=300.0) for _ in range(2000)]
+    batch = best_time(triangulate.triangulate_many, args.repeat, rooms)
+    print(f"\ntriangulate_many: {len(rooms)} rooms with one column each in {batch * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+AutoCad_Buddy - Equipment catalogue
+Equipment offered for layouts and search, by category. Dimensions are in
+centimetres; regions list the markets where an item is available.
+"""
+
+CATALOG = {
+    'kitchen': {
+        'types': ['refrigerator', 'oven', 'stove', 'dishwasher', 'sink', 'counter', 'cabinet', 'island'],
+        'items': [
+            {
+                'name': 'Commercial Refrigerator',
+                'type': 'refrigerator',
+                'dimensions': {'width': 120, 'depth': 80, 'height': 200},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Compact Refrigerator',
+                'type': 'refrigerator',
+                'dimensions': {'width': 60, 'depth': 60, 'height': 150},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Convection Oven',
+                'type': 'oven',
+                'dimensions': {'width': 90, 'depth': 80, 'height': 60},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Pizza Oven',
+                'type': 'oven',
+                'dimensions': {'width': 120, 'depth': 120, 'height': 50},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': '6-Burner Gas Range',
+                'type': 'stove',
+                'dimensions': {'width': 90, 'depth': 80, 'height': 90},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Induction Cooktop',
+                'type': 'stove',
+                'dimensions': {'width': 90, 'depth': 60, 'height': 10},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Industrial Dishwasher',
+                'type': 'dishwasher',
+                'dimensions': {'width': 60, 'depth': 60, 'height': 85},
+                'regions': ['US', 'EU']
+            },
+            {
+                'name': 'Double Basin Sink',
+                'type': 'sink',
+                'dimensions': {'width': 100, 'depth': 60, 'height': 40},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Triple Basin Sink',
+                'type': 'sink',
+                'dimensions': {'width': 150, 'depth': 60, 'height': 40},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Stainless Steel Counter',
+                'type': 'counter',
+                'dimensions': {'width': 180, 'depth': 70, 'height': 90},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Prep Table',
+                'type': 'counter',
+                'dimensions': {'width': 120, 'depth': 70, 'height': 90},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Wall Cabinet',
+                'type': 'cabinet',
+                'dimensions': {'width': 60, 'depth': 35, 'height': 70},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Kitchen Island',
+                'type': 'island',
+                'dimensions': {'width': 150, 'depth': 90, 'height': 90},
+                'regions': ['US', 'EU']
+            }
+        ]
+    },
+    'restaurant': {
+        'types': ['table', 'chair', 'booth', 'bar', 'serving_station', 'host_stand'],
+        'items': [
+            {
+                'name': 'Dining Table',
+                'type': 'table',
+                'dimensions': {'width': 80, 'depth': 80, 'height': 75},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': '2-Person Table',
+                'type': 'table',
+                'dimensions': {'width': 60, 'depth': 60, 'height': 75},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Dining Chair',
+                'type': 'chair',
+                'dimensions': {'width': 45, 'depth': 50, 'height': 90},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Bar Stool',
+                'type': 'chair',
+                'dimensions': {'width': 40, 'depth': 40, 'height': 110},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Corner Booth',
+                'type': 'booth',
+                'dimensions': {'width': 150, 'depth': 150, 'height': 110},
+                'regions': ['US', 'EU']
+            },
+            {
+                'name': 'Bar Counter',
+                'type': 'bar',
+                'dimensions': {'width': 200, 'depth': 60, 'height': 110},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Serving Station',
+                'type': 'serving_station',
+                'dimensions': {'width': 120, 'depth': 60, 'height': 90},
+                'regions': ['US', 'EU', 'Asia']
+            },
+            {
+                'name': 'Host Stand',
+                'type': 'host_stand',
+                'dimensions': {'width': 60, 'depth': 40, 'height': 110},
+                'regions': ['US', 'EU']
+            }
+        ]
+    }
+}
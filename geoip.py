@@ -0,0 +1,204 @@
+"""
+AutoCad_Buddy - Offline IP geolocation
+Client addresses are resolved against a local CSV of IP ranges, so location
+lookups need no network call. Each line starts with range_start,range_end as
+IPv4 or IPv6 addresses (dotted/colon notation or integers); the columns after
+that depend on the format:
+
+    simple        country_code[,region[,city]]
+    dbip-country  country_code                                  (DB-IP lite country)
+    dbip-city     continent,country_code,region,city,lat,long   (DB-IP lite city)
+    ip2location   country_code,country_name[,region,city,...]   (IP2Location LITE DB1-DB11)
+
+IPv4 ranges stored as IPv4-mapped IPv6 addresses, as in the IP2Location IPv6
+files, are served from the IPv4 table. Ranges are loaded into sorted integer
+arrays per address family and resolved with a binary search; results are
+memoized per client address. Call load() at startup (create_app does), so
+with gunicorn --preload the table is built once and shared by the workers.
+"""
+
+import csv
+import bisect
+import logging
+import threading
+import ipaddress
+from array import array
+from functools import lru_cache
+
+logger = logging.getLogger('AutoCad_Buddy_API')
+
+# Client addresses whose lookups are memoized
+CACHE_SIZE = 65536
+
+# Columns of the country code, region and city in each CSV format (None when absent)
+FORMATS = {
+    'simple': (2, 3, 4),
+    'dbip-country': (2, None, None),
+    'dbip-city': (3, 4, 5),
+    'ip2location': (2, 4, 5)
+}
+# Placeholder for unknown values in IP2Location files
+_UNKNOWN = '-'
+
+# IPv4-mapped IPv6 addresses, ::ffff:0.0.0.0 to ::ffff:255.255.255.255
+_IPV4_MAPPED_START = 0xFFFF00000000
+_IPV4_MAPPED_END = 0xFFFFFFFFFFFF
+
+# Equipment catalogue region for each country; everything else is served as US
+_EU_COUNTRIES = {
+    'AT', 'BE', 'BG', 'HR', 'CY', 'CZ', 'DK', 'EE', 'FI', 'FR', 'DE', 'GR', 'HU', 'IE', 'IT', 'LV',
+    'LT', 'LU', 'MT', 'NL', 'PL', 'PT', 'RO', 'SK', 'SI', 'ES', 'SE', 'GB', 'NO', 'CH', 'IS', 'LI'
+}
+_ASIA_COUNTRIES = {
+    'AF', 'AM', 'AZ', 'BD', 'BH', 'BN', 'BT', 'CN', 'GE', 'HK', 'ID', 'IL', 'IN', 'IQ', 'IR', 'JO',
+    'JP', 'KG', 'KH', 'KP', 'KR', 'KW', 'KZ', 'LA', 'LB', 'LK', 'MM', 'MN', 'MO', 'MV', 'MY', 'NP',
+    'OM', 'PH', 'PK', 'PS', 'QA', 'SA', 'SG', 'SY', 'TH', 'TJ', 'TL', 'TM', 'TR', 'TW', 'UZ', 'VN',
+    'YE', 'AE'
+}
+
+
+def equipment_region(country):
+    """Region code used by the equipment catalogue for a country code."""
+    if country in _EU_COUNTRIES:
+        return 'EU'
+    if country in _ASIA_COUNTRIES:
+        return 'Asia'
+    return 'US'
+
+
+def _parse_address(value):
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        return (4 if number <= 0xFFFFFFFF else 6), number
+    address = ipaddress.ip_address(value)
+    return address.version, int(address)
+
+
+def _parse_range(first, last):
+    """(version, start, end) of a CSV range; IPv4-mapped IPv6 ranges become IPv4."""
+    version, start = _parse_address(first)
+    end_version, end = _parse_address(last)
+    if version == 4 and end_version == 6 and first.strip().isdigit():
+        # Integer ranges of IPv6 files may start in the IPv4-sized low addresses
+        version = 6
+    if version != end_version or end < start:
+        raise ValueError("Invalid range")
+    if version == 6 and _IPV4_MAPPED_START <= start and end <= _IPV4_MAPPED_END:
+        return 4, start - _IPV4_MAPPED_START, end - _IPV4_MAPPED_START
+    return version, start, end
+
+
+def _column(row, index):
+    if index is None or index >= len(row):
+        return ''
+    value = row[index].strip()
+    return '' if value == _UNKNOWN else value
+
+
+class _RangeTable:
+    """Non-overlapping address ranges of one family, sorted by start."""
+
+    def __init__(self, typecode):
+        self.starts = array(typecode) if typecode else []
+        self.ends = array(typecode) if typecode else []
+        self.locations = array('I')
+
+    def find(self, number):
+        i = bisect.bisect_right(self.starts, number) - 1
+        if i >= 0 and number <= self.ends[i]:
+            return self.locations[i]
+        return None
+
+
+class GeoIPDatabase:
+    """IP range database loaded from a CSV file in one of FORMATS."""
+
+    def __init__(self, path, csv_format='simple', cache_size=CACHE_SIZE):
+        if csv_format not in FORMATS:
+            raise ValueError(f"Unknown IP geolocation format {csv_format!r}; expected one of {', '.join(FORMATS)}")
+        self.path = path
+        self.format = csv_format
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._tables = {}
+        self._locations = []
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def _load(self):
+        country_column, region_column, city_column = FORMATS[self.format]
+        rows = {4: [], 6: []}
+        interned = {}
+        locations = []
+        try:
+            with open(self.path, newline='') as f:
+                for line_number, row in enumerate(csv.reader(f), 1):
+                    if len(row) <= country_column:
+                        continue
+                    try:
+                        version, start, end = _parse_range(row[0], row[1])
+                    except ValueError:
+                        # The first line may be a header
+                        if line_number > 1:
+                            logger.warning(f"Skipping invalid range on line {line_number} of {self.path}")
+                        continue
+                    country = _column(row, country_column).upper()
+                    if not country:
+                        # Reserved and unassigned ranges resolve to the default location
+                        continue
+                    location = (country, _column(row, region_column), _column(row, city_column))
+                    if location not in interned:
+                        interned[location] = len(locations)
+                        locations.append(location)
+                    rows[version].append((start, end, interned[location]))
+        except FileNotFoundError:
+            logger.warning(f"IP geolocation database not found at {self.path}; using the default location")
+
+        # IPv6 integers do not fit a machine word and stay in lists
+        tables = {4: _RangeTable('I'), 6: _RangeTable(None)}
+        for version, ranges in rows.items():
+            ranges.sort()
+            table = tables[version]
+            for start, end, location in ranges:
+                table.starts.append(start)
+                table.ends.append(end)
+                table.locations.append(location)
+        self._tables = tables
+        self._locations = locations
+        logger.info(f"Loaded {len(rows[4])} IPv4 and {len(rows[6])} IPv6 ranges from {self.path}")
+
+    def load(self):
+        """Load the CSV unless already loaded; lookups load it on first use otherwise."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                    self._loaded = True
+
+    def _lookup(self, address):
+        """Return (country, region, city) for an address string, or None."""
+        self.load()
+        try:
+            address = ipaddress.ip_address(address.strip())
+        except ValueError:
+            return None
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        index = self._tables[address.version].find(int(address))
+        return None if index is None else self._locations[index]
+
+
+def client_address(request, trusted_proxies=1):
+    """
+    Address of the client, taking X-Forwarded-For from trusted proxies into account.
+
+    Each trusted proxy appends the address it received the request from, so
+    the entry trusted_proxies from the right is the last one not supplied by
+    the client itself.
+    """
+    forwarded = request.headers.get('X-Forwarded-For')
+    if forwarded and trusted_proxies > 0:
+        hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+        if hops:
+            return hops[-min(trusted_proxies, len(hops))]
+    return request.remote_addr
@@ -0,0 +1,467 @@
+"""
+AutoCad_Buddy - Incremental DXF reconversion
+Hashes DXF entities and caches their extruded geometry so that a new
+revision of a drawing only re-meshes the entities that were added or changed.
+
+Entity meshes are float32 arrays of shape (triangles, 3, 3). Conversions in
+the API run in recycled sandbox workers spread over several processes, so
+their meshes are kept in a SharedGeometryCache: one .npy file per mesh under
+a directory shared by all processes, with a small in-memory LRU in front.
+"""
+
+import os
+import time
+import struct
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import simplify
+import triangulate
+
+logger = logging.getLogger('AutoCad_Buddy_API')
+
+# Default wall height used when extruding 2D entities (drawing units)
+EXTRUSION_HEIGHT = 3000.0
+# Maximum chord deviation when flattening curves into line segments
+FLATTENING_DISTANCE = 1.0
+# Bytes of entity meshes kept in memory by each process
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Bytes of entity meshes kept on disk by a SharedGeometryCache
+SHARED_CACHE_MAX_BYTES = 2 * 1024 ** 3
+# Minimum seconds between scans that trim a SharedGeometryCache to its size
+SHARED_CACHE_PRUNE_INTERVAL = 60
+# Bumped when the stored mesh format changes, so old files are not read
+MESH_FORMAT = 1
+# Block references nested deeper than this are not expanded (guards against cyclic blocks)
+MAX_BLOCK_DEPTH = 16
+
+# DXF attributes that change between saves without changing geometry
+_VOLATILE_ATTRIBS = {'handle', 'owner'}
+
+
+def _parts_nbytes(parts):
+    return sum(outline.nbytes for outlines, _ in parts for outline in outlines)
+
+
+class GeometryCache:
+    """Thread-safe LRU cache of entity meshes keyed by entity hash, bounded in bytes."""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, size=lambda value: value.nbytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        size = self._size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SharedGeometryCache:
+    """
+    Entity meshes stored as files under directory, shared by every process on the host.
+
+    Files are written atomically and named by a hash of the mesh key, so
+    concurrent writers of the same mesh are harmless. Reads refresh a file's
+    mtime, and the least recently used files are removed once the directory
+    exceeds max_bytes; each process scans it at most every
+    SHARED_CACHE_PRUNE_INTERVAL seconds.
+    """
+
+    def __init__(self, directory, max_bytes=SHARED_CACHE_MAX_BYTES, memory_bytes=CACHE_MAX_BYTES // 4):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory = GeometryCache(memory_bytes)
+        self._last_prune = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        name = hashlib.blake2b(f"{MESH_FORMAT}|{key}".encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.directory, name[:2], f"{name}.npy")
+
+    def get(self, key):
+        mesh = self.memory.get(key)
+        if mesh is not None:
+            return mesh
+        path = self._path(key)
+        try:
+            mesh = np.load(path, allow_pickle=False)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        self.memory.put(key, mesh)
+        return mesh
+
+    def put(self, key, mesh):
+        self.memory.put(key, mesh)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.tmp', delete=False) as f:
+            np.save(f, mesh, allow_pickle=False)
+        os.replace(f.name, path)
+        self.prune()
+
+    def prune(self, force=False):
+        """Remove least recently used files until the cache fits max_bytes."""
+        now = time.monotonic()
+        if not force and now - self._last_prune < SHARED_CACHE_PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        files = []
+        total = 0
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        files.sort()
+        # Trim below the limit so the next scans have headroom
+        target = self.max_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+geometry_cache = GeometryCache()
+outline_cache = GeometryCache(size=_parts_nbytes)
+
+
+def _entity_vertices(entity):
+    """Return the raw vertex data of an entity that is not stored in its DXF attributes."""
+    dxftype = entity.dxftype()
+    if dxftype == 'LWPOLYLINE':
+        return [tuple(p) for p in entity.get_points()]
+    if dxftype == 'POLYLINE':
+        return [tuple(v.dxf.location) for v in entity.vertices]
+    if dxftype == 'SPLINE':
+        return [tuple(p) for p in entity.control_points] + [tuple(p) for p in entity.fit_points]
+    if dxftype == 'HATCH':
+        # Boundary path objects have no stable representation; hash their geometry
+        return [[tuple(v) for v in outline] for outline in entity_outlines(entity)]
+    return []
+
+
+def _block_hash(insert, height, blocks, depth):
+    """Hash of the block definition referenced by an INSERT, memoized by block name in blocks."""
+    name = insert.dxf.name
+    if name not in blocks:
+        block = insert.block()
+        if block is None or depth >= MAX_BLOCK_DEPTH:
+            blocks[name] = ''
+        else:
+            # Placeholder while hashing, so a block that references itself terminates
+            blocks[name] = ''
+            parts = [repr(tuple(block.block.dxf.base_point))]
+            parts.extend(entity_hash(entity, height, blocks, depth + 1) for entity in block)
+            blocks[name] = hashlib.blake2b('|'.join(parts).encode('utf-8'), digest_size=16).hexdigest()
+    return blocks[name]
+
+
+def entity_hash(entity, height=EXTRUSION_HEIGHT, blocks=None, depth=0):
+    """
+    Compute a content hash for an entity that is stable across saves of the drawing.
+
+    Block references also hash the content of their block definition, so
+    editing a block changes the hash of every INSERT of it. blocks memoizes
+    block hashes by name; pass one dict for all entities of a document.
+    """
+    attribs = entity.dxf.all_existing_dxf_attribs()
+    parts = [entity.dxftype(), repr(height)]
+    for name in sorted(attribs):
+        if name not in _VOLATILE_ATTRIBS:
+            parts.append(f"{name}={attribs[name]!r}")
+    parts.append(repr(_entity_vertices(entity)))
+    if entity.dxftype() == 'INSERT':
+        parts.append(_block_hash(entity, height, {} if blocks is None else blocks, depth))
+    return hashlib.blake2b('|'.join(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def is_region(entity):
+    """True for entities that describe a filled area and are extruded as solids."""
+    return entity.dxftype() == 'HATCH'
+
+
+def expand_entity(entity, depth=0):
+    """Yield the entities drawn by entity: block references are replaced by their content in WCS."""
+    from ezdxf.lldxf.const import DXFError
+
+    if entity.dxftype() != 'INSERT':
+        yield entity
+        return
+    if depth >= MAX_BLOCK_DEPTH:
+        logger.warning(f"Not expanding block {entity.dxf.name}: nested more than {MAX_BLOCK_DEPTH} levels deep")
+        return
+    # MINSERT arrays are expanded into one virtual INSERT per grid cell
+    inserts = entity.multi_insert() if entity.mcount > 1 else [entity]
+    for insert in inserts:
+        try:
+            children = list(insert.virtual_entities())
+        except DXFError as e:
+            logger.warning(f"Skipping block reference {insert.dxf.name}: {e}")
+            continue
+        for child in children:
+            yield from expand_entity(child, depth + 1)
+
+
+def entity_outlines(entity):
+    """Flatten a single 2D entity into a list of outlines, each a list of (x, y) points."""
+    from ezdxf import path as dxf_path
+
+    if entity.dxftype() == 'INSERT':
+        return [outline for child in expand_entity(entity) for outline in entity_outlines(child)]
+    if is_region(entity):
+        paths = dxf_path.from_hatch(entity)
+    else:
+        try:
+            paths = [dxf_path.make_path(entity)]
+        except TypeError:
+            # Entity type without a 2D outline (text, dimensions, ...)
+            return []
+    return [[(v.x, v.y) for v in entity_path.flattening(FLATTENING_DISTANCE)] for entity_path in paths]
+
+
+def extrude_outline(points, height=EXTRUSION_HEIGHT):
+    """Extrude a 2D outline into a list of wall triangles."""
+    points = [tuple(p) for p in np.asarray(points, dtype=float).tolist()]
+    triangles = []
+    for (x1, y1), (x2, y2) in zip(points, points[1:]):
+        if x1 == x2 and y1 == y2:
+            continue
+        bottom1, bottom2 = (x1, y1, 0.0), (x2, y2, 0.0)
+        top1, top2 = (x1, y1, height), (x2, y2, height)
+        triangles.append((bottom1, bottom2, top2))
+        triangles.append((bottom1, top2, top1))
+    return triangles
+
+
+def _group_regions(outlines):
+    """Group closed outlines into (outer, holes) polygons by nesting depth."""
+    rings = [ring for ring in (list(map(tuple, outline)) for outline in outlines) if len(ring) >= 3]
+    rings.sort(key=lambda ring: -abs(triangulate.signed_area(ring)))
+    polygons = []
+    placed = []  # (ring, polygon or None for holes)
+    for ring in rings:
+        container = None
+        for other, polygon in reversed(placed):
+            if triangulate.point_in_ring(ring[0], other):
+                container = (other, polygon)
+                break
+        if container is not None and container[1] is not None:
+            # Directly inside an outer ring: a hole of that polygon
+            container[1][1].append(ring)
+            placed.append((ring, None))
+        else:
+            polygon = (ring, [])
+            polygons.append(polygon)
+            placed.append((ring, polygon))
+    return polygons
+
+
+def cap_triangles(outlines, height=EXTRUSION_HEIGHT):
+    """Triangulate the bottom and top caps of a region bounded by closed outlines."""
+    points, faces = triangulate.triangulate_many(_group_regions(outlines))
+    triangles = []
+    for a, b, c in faces:
+        (ax, ay), (bx, by), (cx, cy) = points[a], points[b], points[c]
+        triangles.append(((ax, ay, 0.0), (cx, cy, 0.0), (bx, by, 0.0)))
+        triangles.append(((ax, ay, height), (bx, by, height), (cx, cy, height)))
+    return triangles
+
+
+def mesh_outlines(outlines, height=EXTRUSION_HEIGHT, tolerance=0.0, region=False):
+    """Simplify and extrude outlines into wall triangles, adding caps for regions."""
+    outlines = [simplify.simplify_polyline(outline, tolerance) for outline in outlines]
+    triangles = [triangle for outline in outlines for triangle in extrude_outline(outline, height)]
+    if region:
+        triangles.extend(cap_triangles(outlines, height))
+    return triangles
+
+
+def entity_parts(entity):
+    """Outlines of an entity as (outlines, region) pairs, one per entity drawn by a block reference."""
+    return [(entity_outlines(child), is_region(child)) for child in expand_entity(entity)]
+
+
+def mesh_parts(parts, height=EXTRUSION_HEIGHT, tolerance=0.0):
+    """Mesh the (outlines, region) pairs of an entity into a float32 array of triangles."""
+    triangles = [triangle for outlines, region in parts for triangle in mesh_outlines(outlines, height, tolerance, region)]
+    return np.asarray(triangles, dtype=np.float32).reshape(-1, 3, 3)
+
+
+def mesh_entity(entity, height=EXTRUSION_HEIGHT, tolerance=0.0):
+    """Simplify and extrude a single 2D entity (or the content of a block reference) into triangles."""
+    return mesh_parts(entity_parts(entity), height, tolerance)
+
+
+_STL_FACET = np.dtype([('normal', '<f4', 3), ('vertices', '<f4', (3, 3)), ('attributes', '<u2')])
+
+
+def write_stl(triangles, output_path, name=b'AutoCad_Buddy'):
+    """Write triangles (an array of shape (n, 3, 3)) to a binary STL file."""
+    triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+    facets = np.zeros(len(triangles), dtype=_STL_FACET)
+    facets['normal'] = normals
+    facets['vertices'] = triangles
+    with open(output_path, 'wb') as f:
+        f.write(name[:80].ljust(80, b'\0'))
+        f.write(struct.pack('<I', len(triangles)))
+        facets.tofile(f)
+    return output_path
+
+
+def _mesh_key(key, tolerance):
+    return f"{key}:{tolerance!r}"
+
+
+def _mesh_entities(entries, height, tolerance, cache, mesh):
+    """
+    Mesh (key, source) pairs at the given tolerance with mesh(source, ...), reusing cached meshes.
+
+    Returns (meshes, fresh) where fresh lists the (mesh_key, mesh) pairs that
+    were not cached. The caller stores them once the tolerance is final, so
+    trial tolerances of the triangle budget do not evict useful meshes.
+    """
+    meshes = []
+    fresh = []
+    for key, source in entries:
+        mesh_key = _mesh_key(key, tolerance)
+        entity_triangles = cache.get(mesh_key)
+        if entity_triangles is None:
+            entity_triangles = mesh(source, height, tolerance)
+            fresh.append((mesh_key, entity_triangles))
+        meshes.append(entity_triangles)
+    return meshes, fresh
+
+
+def _cached_parts(key, entity, cache):
+    parts = cache.get(key)
+    if parts is None:
+        parts = [([np.asarray(outline, dtype=float) for outline in outlines], region)
+                 for outlines, region in entity_parts(entity)]
+        cache.put(key, parts)
+    return parts
+
+
+def count_stl_triangles(path):
+    """Number of facets in a binary or ASCII STL file."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.read(84)
+        if len(header) == 84:
+            count = struct.unpack('<I', header[80:])[0]
+            # ASCII files may also start with 'solid'; the size only matches for binary ones
+            if size == 84 + 50 * count:
+                return count
+        f.seek(0)
+        return sum(1 for line in f if line.lstrip().startswith(b'facet'))
+
+
+def convert_revision(input_path, output_path, base_hashes=None, height=EXTRUSION_HEIGHT,
+                     tolerance=0.0, max_triangles=None, cache=geometry_cache):
+    """
+    Convert a DXF revision to STL, re-meshing only entities missing from the cache.
+
+    Outlines are simplified with the given tolerance before extrusion; if the
+    model still exceeds max_triangles the tolerance is raised until it fits.
+    Returns a tuple of (output_path, entity_hashes, stats) where entity_hashes
+    should be stored with the model so the next revision can be diffed against it.
+    """
+    import ezdxf
+
+    doc = ezdxf.readfile(input_path)
+    base_hashes = set(base_hashes or ())
+
+    blocks = {}
+    entries = [(entity_hash(entity, height, blocks), entity) for entity in doc.modelspace()]
+    entity_hashes = [key for key, _ in entries]
+
+    meshes, fresh = _mesh_entities(entries, height, tolerance, cache, mesh_entity)
+    total = sum(len(mesh) for mesh in meshes)
+    if max_triangles is not None and total > max_triangles:
+        # Over budget: estimate a coarser tolerance for the whole model from its
+        # outlines (regions count twice for their caps), then remesh at it
+        entity_part_lists = [_cached_parts(key, entity, outline_cache) for key, entity in entries]
+        outlines = []
+        weights = []
+        for parts in entity_part_lists:
+            for part_outlines, region in parts:
+                outlines.extend(part_outlines)
+                weights.extend([2 if region else 1] * len(part_outlines))
+        _, tolerance = simplify.simplify_outlines(outlines, tolerance, max_triangles, weights)
+
+        part_entries = [(key, parts) for (key, _), parts in zip(entries, entity_part_lists)]
+        for _ in range(simplify.MAX_BUDGET_ITERATIONS):
+            meshes, fresh = _mesh_entities(part_entries, height, tolerance, cache, mesh_parts)
+            total = sum(len(mesh) for mesh in meshes)
+            if total <= max_triangles:
+                break
+            # The estimate ignores a few triangles per hole in region caps
+            tolerance *= 2
+        else:
+            raise simplify.TriangleBudgetExceeded(
+                f"Model needs at least {total} triangles, exceeding the budget of {max_triangles}"
+            )
+
+    for mesh_key, entity_triangles in fresh:
+        cache.put(mesh_key, entity_triangles)
+    remeshed = len(fresh)
+
+    triangles = np.concatenate(meshes) if meshes else np.zeros((0, 3, 3), dtype=np.float32)
+    write_stl(triangles, output_path)
+
+    current = set(entity_hashes)
+    reused = len(entries) - remeshed
+    stats = {
+        "entities": len(entity_hashes),
+        "reused": reused,
+        "remeshed": remeshed,
+        "added_or_changed": len(current - base_hashes),
+        "removed": len(base_hashes - current),
+        "triangles": len(triangles),
+        "tolerance": tolerance,
+        "reuse_ratio": round(reused / len(entity_hashes), 4) if entity_hashes else 0.0
+    }
+    logger.info(f"Incremental conversion of {input_path}: {stats}")
+    return output_path, entity_hashes, stats
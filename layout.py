@@ -0,0 +1,428 @@
+"""
+AutoCad_Buddy - Automatic equipment layout
+Packs catalogue equipment into the room outline of a floor plan. Wall items
+(counters, refrigerators, bars, ...) slide along the axis-aligned walls with
+their back against the wall; free-standing items (dining sets, islands) are
+placed first-fit in row-major order. Every item keeps a clearance zone in
+front of it, or all around it when free-standing. Zones may overlap each
+other as shared aisles but never another item or a wall.
+
+Walls and placed items are indexed in uniform-grid spatial hashes, so each
+candidate position is only tested against its neighbourhood.
+"""
+
+import math
+import logging
+
+import incremental
+import triangulate
+
+logger = logging.getLogger('AutoCad_Buddy_API')
+
+# Centimetres per drawing unit; catalogue dimensions are in centimetres
+UNIT_SCALE = {'mm': 0.1, 'cm': 1.0, 'm': 100.0, 'in': 2.54, 'ft': 30.48}
+# Distance between candidate positions, in cm
+GRID_STEP = 10.0
+# Spatial hash cell size, in cm
+CELL_SIZE = 100.0
+# Upper bound on items per request
+MAX_ITEMS = 2000
+
+SEATS_PER_TABLE = 4
+# Clearance in front of (wall items) or around (free-standing items) each type, in cm
+DEFAULT_CLEARANCE = 60.0
+CLEARANCES = {
+    'refrigerator': 100.0,
+    'oven': 100.0,
+    'dishwasher': 90.0,
+    'sink': 90.0,
+    'counter': 90.0,
+    'stove': 100.0,
+    'cabinet': 60.0,
+    'island': 100.0,
+    'table': 60.0,
+    'booth': 90.0,
+    'bar': 100.0,
+    'serving_station': 90.0,
+    'host_stand': 90.0,
+}
+WALL_TYPES = {
+    'refrigerator', 'oven', 'dishwasher', 'sink', 'counter', 'stove', 'cabinet',
+    'booth', 'bar', 'serving_station', 'host_stand'
+}
+
+_EPSILON = 1e-6
+
+
+class LayoutError(ValueError):
+    """Raised for layout requests that cannot be planned."""
+
+
+def _overlaps(a, b):
+    return (a[0] < b[2] - _EPSILON and b[0] < a[2] - _EPSILON and
+            a[1] < b[3] - _EPSILON and b[1] < a[3] - _EPSILON)
+
+
+def _segment_crosses_box(a, b, box):
+    """True if segment ab passes through the interior of box (Liang-Barsky clipping)."""
+    x0, y0, x1, y1 = box[0] + _EPSILON, box[1] + _EPSILON, box[2] - _EPSILON, box[3] - _EPSILON
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, a[0] - x0), (dx, x1 - a[0]), (-dy, a[1] - y0), (dy, y1 - a[1])):
+        if p == 0:
+            if q < 0:
+                return False
+            continue
+        t = q / p
+        if p < 0:
+            t0 = max(t0, t)
+        else:
+            t1 = min(t1, t)
+        if t0 > t1:
+            return False
+    return True
+
+
+class SpatialHash:
+    """Uniform grid mapping each cell to the objects whose bounding boxes touch it."""
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def _cells(self, box):
+        size = self.cell_size
+        for i in range(math.floor(box[0] / size), math.floor(box[2] / size) + 1):
+            for j in range(math.floor(box[1] / size), math.floor(box[3] / size) + 1):
+                yield i, j
+
+    def insert(self, box, value):
+        for cell in self._cells(box):
+            self.cells.setdefault(cell, []).append(value)
+
+    def query(self, box):
+        """Objects in the cells touched by box, each once."""
+        seen = set()
+        for cell in self._cells(box):
+            for value in self.cells.get(cell, ()):
+                if id(value) not in seen:
+                    seen.add(id(value))
+                    yield value
+
+
+def _clean_ring(ring):
+    points = []
+    for point in ring:
+        point = (float(point[0]), float(point[1]))
+        if not points or math.dist(point, points[-1]) > _EPSILON:
+            points.append(point)
+    if len(points) > 1 and math.dist(points[0], points[-1]) <= _EPSILON:
+        points.pop()
+    return points
+
+
+class Room:
+    """Room outline with optional obstacles (columns, shafts), in cm."""
+
+    def __init__(self, outline, obstacles=()):
+        self.outline = _clean_ring(outline)
+        if len(self.outline) < 3 or abs(triangulate.signed_area(self.outline)) < _EPSILON:
+            raise LayoutError("Room outline must be a polygon with a non-zero area")
+        self.obstacles = [ring for ring in (_clean_ring(o) for o in obstacles) if len(ring) >= 3]
+        xs = [x for x, _ in self.outline]
+        ys = [y for _, y in self.outline]
+        self.bounds = (min(xs), min(ys), max(xs), max(ys))
+        self.walls = SpatialHash()
+        for ring in [self.outline] + self.obstacles:
+            for i in range(len(ring)):
+                a, b = ring[i - 1], ring[i]
+                self.walls.insert((min(a[0], b[0]), min(a[1], b[1]), max(a[0], b[0]), max(a[1], b[1])), (a, b))
+
+    def inside(self, point):
+        return (triangulate.point_in_ring(point, self.outline) and
+                not any(triangulate.point_in_ring(point, ring) for ring in self.obstacles))
+
+    def contains(self, box):
+        """True if box lies inside the room without crossing a wall or obstacle."""
+        for a, b in self.walls.query(box):
+            if _segment_crosses_box(a, b, box):
+                return False
+        return self.inside(((box[0] + box[2]) / 2, (box[1] + box[3]) / 2))
+
+    def wall_candidates(self, width, depth, clearance):
+        """
+        Positions with an item's back against an axis-aligned wall of the outline.
+
+        Returns a list of (body, zone, rotation); rotation is the direction the
+        front faces, counter-clockwise from +y in degrees.
+        """
+        candidates = []
+        for i in range(len(self.outline)):
+            a, b = self.outline[i - 1], self.outline[i]
+            if abs(a[1] - b[1]) <= _EPSILON:
+                lo, hi = sorted((a[0], b[0]))
+                y = a[1]
+                up = self.inside(((lo + hi) / 2, y + GRID_STEP / 2))
+                x = lo
+                while x + width <= hi + _EPSILON:
+                    if up:
+                        candidates.append(((x, y, x + width, y + depth),
+                                           (x, y + depth, x + width, y + depth + clearance), 0))
+                    else:
+                        candidates.append(((x, y - depth, x + width, y),
+                                           (x, y - depth - clearance, x + width, y - depth), 180))
+                    x += GRID_STEP
+            elif abs(a[0] - b[0]) <= _EPSILON:
+                lo, hi = sorted((a[1], b[1]))
+                x = a[0]
+                right = self.inside((x + GRID_STEP / 2, (lo + hi) / 2))
+                y = lo
+                while y + width <= hi + _EPSILON:
+                    if right:
+                        candidates.append(((x, y, x + depth, y + width),
+                                           (x + depth, y, x + depth + clearance, y + width), 270))
+                    else:
+                        candidates.append(((x - depth, y, x, y + width),
+                                           (x - depth - clearance, y, x - depth, y + width), 90))
+                    y += GRID_STEP
+        return candidates
+
+
+class Planner:
+    """Places items one by one, first fit, keeping placed bodies and zones in a spatial hash."""
+
+    def __init__(self, room):
+        self.room = room
+        self.occupied = SpatialHash()
+        # Search position per item shape; placements only add obstacles, so
+        # positions rejected for a shape stay rejected
+        self._cursors = {}
+
+    def blocked_until(self, body, zone, clearance=0.0):
+        """
+        Check a candidate against placed items.
+
+        Returns None if it is free, otherwise the smallest x for the body's
+        left edge at which the blocking items no longer overlap it, given a
+        zone extending clearance to the left of the body.
+        """
+        until = None
+        search = (min(body[0], zone[0]), min(body[1], zone[1]), max(body[2], zone[2]), max(body[3], zone[3]))
+        for rect, is_body in self.occupied.query(search):
+            if _overlaps(body, rect):
+                required = rect[2]
+            elif is_body and _overlaps(zone, rect):
+                required = rect[2] + clearance
+            else:
+                continue
+            until = required if until is None else max(until, required)
+        return until
+
+    def fits(self, body, zone):
+        return (self.blocked_until(body, zone) is None and
+                self.room.contains(body) and self.room.contains(zone))
+
+    def occupy(self, body, zone):
+        self.occupied.insert(body, (body, True))
+        self.occupied.insert(zone, (zone, False))
+
+    def place_on_wall(self, width, depth, clearance):
+        """Place an item against a wall; returns (body, rotation) or None."""
+        key = ('wall', width, depth, clearance)
+        if key not in self._cursors:
+            self._cursors[key] = (self.room.wall_candidates(width, depth, clearance), 0)
+        candidates, start = self._cursors[key]
+        for index in range(start, len(candidates)):
+            body, zone, rotation = candidates[index]
+            if self.fits(body, zone):
+                self.occupy(body, zone)
+                self._cursors[key] = (candidates, index + 1)
+                return body, rotation
+        self._cursors[key] = (candidates, len(candidates))
+        return None
+
+    def place_free(self, width, depth, clearance):
+        """Place a free-standing item first fit in row-major order; returns its body or None."""
+        key = ('free', width, depth, clearance)
+        left, bottom, right, top = self.room.bounds
+        y, x = self._cursors.get(key, (bottom + clearance, left + clearance))
+        while y + depth + clearance <= top + _EPSILON:
+            while x + width + clearance <= right + _EPSILON:
+                body = (x, y, x + width, y + depth)
+                zone = (x - clearance, y - clearance, x + width + clearance, y + depth + clearance)
+                until = self.blocked_until(body, zone, clearance)
+                if until is None:
+                    if self.room.contains(body) and self.room.contains(zone):
+                        self.occupy(body, zone)
+                        self._cursors[key] = (y, x + width)
+                        return body
+                    x += GRID_STEP
+                else:
+                    # Jump past the blocking items, staying on the grid
+                    x += max(GRID_STEP, math.ceil((until - x) / GRID_STEP) * GRID_STEP)
+            y += GRID_STEP
+            x = left + clearance
+        self._cursors[key] = (y, x)
+        return None
+
+
+def catalog_item(catalog, equipment_type, region):
+    """First catalogue item of a type available in region, or None."""
+    for item in catalog:
+        if item['type'] == equipment_type and region in item['regions']:
+            return item
+    return None
+
+
+def _placement(item, body, rotation, scale):
+    return {
+        "type": item['type'],
+        "name": item['name'],
+        "x": round((body[0] + body[2]) / 2 / scale, 3),
+        "y": round((body[1] + body[3]) / 2 / scale, 3),
+        "width": round(item['dimensions']['width'] / scale, 3),
+        "depth": round(item['dimensions']['depth'] / scale, 3),
+        "height": round(item['dimensions']['height'] / scale, 3),
+        "rotation": rotation
+    }
+
+
+def _place_dining_set(planner, table, chair, clearance, scale):
+    """Place a table with a chair on each side; returns its placements or None."""
+    width = table['dimensions']['width']
+    depth = table['dimensions']['depth']
+    chair_depth = chair['dimensions']['depth'] if chair else 0.0
+    body = planner.place_free(width + 2 * chair_depth, depth + 2 * chair_depth, clearance)
+    if body is None:
+        return None
+    x0, y0, x1, y1 = body
+    table_body = (x0 + chair_depth, y0 + chair_depth, x1 - chair_depth, y1 - chair_depth)
+    placements = [_placement(table, table_body, 0, scale)]
+    if chair:
+        cx = (x0 + x1) / 2
+        cy = (y0 + y1) / 2
+        half = chair['dimensions']['width'] / 2
+        # Each chair faces the table
+        for chair_body, rotation in (((cx - half, y0, cx + half, y0 + chair_depth), 0),
+                                     ((cx - half, y1 - chair_depth, cx + half, y1), 180),
+                                     ((x0, cy - half, x0 + chair_depth, cy + half), 270),
+                                     ((x1 - chair_depth, cy - half, x1, cy + half), 90)):
+            placements.append(_placement(chair, chair_body, rotation, scale))
+    return placements
+
+
+def plan_layout(outline, items, catalog, region, obstacles=(), units='cm', seats=None):
+    """
+    Lay out equipment in a room.
+
+    outline and obstacles are rings of (x, y) points in the given units; items
+    is a list of {"type", "count"}; seats adds enough dining tables (with
+    chairs) to seat that many guests. Returns the placements in the same units
+    and the number of requested items that did not fit.
+    """
+    if units not in UNIT_SCALE:
+        raise LayoutError(f"Unknown units: {units}. Use one of {', '.join(UNIT_SCALE)}")
+    scale = UNIT_SCALE[units]
+    try:
+        room = Room([(x * scale, y * scale) for x, y in outline],
+                    [[(x * scale, y * scale) for x, y in ring] for ring in obstacles])
+    except (TypeError, ValueError) as e:
+        if isinstance(e, LayoutError):
+            raise
+        raise LayoutError("Outlines must be lists of [x, y] points")
+
+    requested = []
+    for entry in items:
+        if not isinstance(entry, dict) or not isinstance(entry.get('type'), str):
+            raise LayoutError("Each item needs a type")
+        count = entry.get('count', 1)
+        if not isinstance(count, int) or count < 0:
+            raise LayoutError("Item counts must be non-negative integers")
+        requested.append((entry['type'], count))
+    if seats:
+        if not isinstance(seats, int) or seats < 0:
+            raise LayoutError("Seats must be a non-negative integer")
+        requested.append(('table', math.ceil(seats / SEATS_PER_TABLE)))
+    if sum(count for _, count in requested) > MAX_ITEMS:
+        raise LayoutError(f"At most {MAX_ITEMS} items can be laid out at once")
+
+    resolved = []
+    for equipment_type, count in requested:
+        item = catalog_item(catalog, equipment_type, region)
+        if item is None:
+            raise LayoutError(f"No {equipment_type} available in region {region}")
+        resolved.append((item, count))
+    chair = catalog_item(catalog, 'chair', region)
+
+    # Wall items in the requested order, then free-standing items largest first
+    def order(entry):
+        item, _ = entry
+        if item['type'] in WALL_TYPES:
+            # The sort is stable, so equal keys keep the requested order
+            return (False, 0)
+        dimensions = item['dimensions']
+        return (True, -dimensions['width'] * dimensions['depth'])
+    resolved.sort(key=order)
+
+    planner = Planner(room)
+    placements = []
+    unplaced = {}
+    placed_seats = 0
+    for item, count in resolved:
+        equipment_type = item['type']
+        clearance = CLEARANCES.get(equipment_type, DEFAULT_CLEARANCE)
+        width = item['dimensions']['width']
+        depth = item['dimensions']['depth']
+        for placed in range(count):
+            if equipment_type == 'table':
+                dining_set = _place_dining_set(planner, item, chair, clearance, scale)
+                if dining_set:
+                    placements.extend(dining_set)
+                    placed_seats += len(dining_set) - 1
+                    continue
+            elif equipment_type in WALL_TYPES:
+                result = planner.place_on_wall(width, depth, clearance)
+                if result:
+                    placements.append(_placement(item, result[0], result[1], scale))
+                    continue
+            else:
+                body = planner.place_free(width, depth, clearance)
+                if body is None and width != depth:
+                    body = planner.place_free(depth, width, clearance)
+                    rotation = 90
+                else:
+                    rotation = 0
+                if body:
+                    placements.append(_placement(item, body, rotation, scale))
+                    continue
+            # Later items of the same type cannot fit either
+            unplaced[equipment_type] = unplaced.get(equipment_type, 0) + count - placed
+            break
+
+    return {"placements": placements, "seats": placed_seats, "unplaced": unplaced, "units": units}
+
+
+def room_outline(input_path):
+    """
+    Room outline of a DXF floor plan: its largest closed outline, plus the
+    closed outlines inside it as obstacles. Coordinates are in drawing units.
+    """
+    import ezdxf
+
+    doc = ezdxf.readfile(input_path)
+    rings = []
+    for entity in doc.modelspace():
+        for outline in incremental.entity_outlines(entity):
+            if len(outline) >= 4 and math.dist(outline[0], outline[-1]) <= _EPSILON:
+                rings.append(_clean_ring(outline))
+    rings = [ring for ring in rings if len(ring) >= 3]
+    if not rings:
+        raise LayoutError("Drawing has no closed outline to use as the room")
+
+    areas = [abs(triangulate.signed_area(ring)) for ring in rings]
+    room_area = max(areas)
+    room = rings[areas.index(room_area)]
+    # Smaller closed outlines inside the room (columns, shafts) are kept clear
+    obstacles = [ring for ring, area in zip(rings, areas)
+                 if area < room_area * 0.5 and triangulate.point_in_ring(ring[0], room)]
+    return room, obstacles
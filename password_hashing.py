@@ -0,0 +1,173 @@
+"""
+AutoCad_Buddy - Bounded password hashing
+PBKDF2 hashing and verification are limited host-wide: at most max_workers
+operations run at once across every gunicorn worker, and at most max_queue
+more wait for a turn. When the queue is full callers get HashingBusy
+immediately, which the API turns into a 429, so a login burst can neither
+take every core nor pile up behind the hashing slots.
+
+Slots live in a SQLite database on local disk (see shared_state), so the
+limit holds for sync workers as well as threaded ones. A waiting login still
+occupies its gunicorn worker (or thread): keep PASSWORD_HASH_WORKERS plus
+PASSWORD_HASH_QUEUE below the number of workers so the rest stay free for
+/health and the other routes.
+
+The hash method and its parameters are werkzeug's; only scheduling changes.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+
+from werkzeug import security
+
+import shared_state
+
+logger = logging.getLogger('AutoCad_Buddy_API')
+
+# Operations running at once on the host
+MAX_WORKERS = 2
+# Operations allowed to wait for a free slot before new ones are rejected
+MAX_QUEUE = 4
+# Seconds a caller waits for a free slot before giving up
+TIMEOUT = 10.0
+# Seconds between checks of a waiting operation for its turn
+POLL_INTERVAL = 0.01
+# Seconds between purges of leaked slots while waiting
+PURGE_INTERVAL = 0.5
+# Slots older than this are assumed leaked by a crashed worker
+SLOT_TTL = 60
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS slots "
+    "(id INTEGER PRIMARY KEY, running INTEGER NOT NULL, pid INTEGER NOT NULL, started REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+)
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full or a slot takes too long to free up."""
+
+    retry_after = 1
+
+
+class HashingLimiter:
+    """Running and waiting hashing operations, counted through a SQLite file."""
+
+    def __init__(self, path, max_workers=MAX_WORKERS, max_queue=MAX_QUEUE, timeout=TIMEOUT):
+        self.path = path
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.state = shared_state.SharedState(path, SCHEMA)
+
+    def _write(self, update):
+        """Run update(connection) in a write transaction and return its result."""
+        # Rejections keep the purge of leaked slots and the rejection count
+        with self.state.transaction(HashingBusy("Server is busy"), commit_on=HashingBusy) as connection:
+            return update(connection)
+
+    def _maintain(self, connection):
+        """Drop leaked slots and hand free running slots to the oldest waiting operations."""
+        now = time.time()
+        for slot_id, pid, started in connection.execute("SELECT id, pid, started FROM slots").fetchall():
+            if started < now - SLOT_TTL or not shared_state.process_alive(pid):
+                connection.execute("DELETE FROM slots WHERE id = ?", (slot_id,))
+        running, waiting = connection.execute(
+            "SELECT COALESCE(SUM(running), 0), COUNT(*) - COALESCE(SUM(running), 0) FROM slots").fetchone()
+        free = self.max_workers - running
+        if free > 0 and waiting:
+            connection.execute("UPDATE slots SET running = 1 WHERE id IN "
+                               "(SELECT id FROM slots WHERE running = 0 ORDER BY id LIMIT ?)", (free,))
+            promoted = min(free, waiting)
+            running, waiting = running + promoted, waiting - promoted
+        return running, waiting
+
+    def _enter(self, connection):
+        running, waiting = self._maintain(connection)
+        if running < self.max_workers:
+            state = 1
+        elif waiting < self.max_queue:
+            state = 0
+        else:
+            _count(connection, 'rejected')
+            raise HashingBusy("Too many concurrent authentication requests")
+        cursor = connection.execute("INSERT INTO slots (running, pid, started) VALUES (?, ?, ?)",
+                                    (state, os.getpid(), time.time()))
+        return cursor.lastrowid, state
+
+    def _leave(self, slot_id, outcome):
+        def update(connection):
+            connection.execute("DELETE FROM slots WHERE id = ?", (slot_id,))
+            _count(connection, outcome)
+            self._maintain(connection)
+        try:
+            self._write(update)
+        except (HashingBusy, sqlite3.OperationalError) as e:
+            # Purged later once the slot expires
+            logger.warning(f"Could not release password hashing slot {slot_id}: {e}")
+
+    def _wait(self, slot_id):
+        """Block until slot_id is promoted to running; False on timeout."""
+        deadline = time.monotonic() + self.timeout
+        next_purge = time.monotonic() + PURGE_INTERVAL
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            with self.state.connection() as connection:
+                row = connection.execute("SELECT running FROM slots WHERE id = ?", (slot_id,)).fetchone()
+            if row is None:
+                # Purged as leaked after SLOT_TTL
+                return False
+            if row[0]:
+                return True
+            if time.monotonic() >= next_purge:
+                # Frees the slots of workers that died while hashing
+                self._write(self._maintain)
+                next_purge = time.monotonic() + PURGE_INTERVAL
+        return False
+
+    def run(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) once a slot is free and return its result."""
+        slot_id, running = self._write(self._enter)
+        if not running:
+            try:
+                promoted = self._wait(slot_id)
+            except BaseException:
+                self._leave(slot_id, 'rejected')
+                raise
+            if not promoted:
+                self._leave(slot_id, 'rejected')
+                raise HashingBusy("Authentication timed out waiting for a hashing slot")
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._leave(slot_id, 'completed')
+
+    def generate_password_hash(self, password, **kwargs):
+        """werkzeug.security.generate_password_hash within the limit."""
+        return self.run(security.generate_password_hash, password, **kwargs)
+
+    def check_password_hash(self, pwhash, password):
+        """werkzeug.security.check_password_hash within the limit."""
+        return self.run(security.check_password_hash, pwhash, password)
+
+    def stats(self):
+        with self.state.connection() as connection:
+            running, waiting = connection.execute(
+                "SELECT COALESCE(SUM(running), 0), COUNT(*) - COALESCE(SUM(running), 0) FROM slots").fetchone()
+            counters = dict(connection.execute("SELECT name, value FROM counters").fetchall())
+        return {
+            "workers": self.max_workers,
+            "running": running,
+            "queue_depth": waiting,
+            "queue_limit": self.max_queue,
+            "completed": counters.get('completed', 0),
+            "rejected": counters.get('rejected', 0)
+        }
+
+
+def _count(connection, name):
+    connection.execute("INSERT INTO counters (name, value) VALUES (?, 1) "
+                       "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
@@ -0,0 +1,221 @@
+"""
+AutoCad_Buddy - Sampling profiler
+Samples the Python stacks of every thread in the serving process through
+sys._current_frames() and aggregates them into collapsed stacks, the input
+format of flamegraph.pl and speedscope. Each sample is prefixed with the
+route and conversion stage its thread was executing.
+
+Nothing runs between profiles: request threads only record their route and
+stage in a dict, and sampling happens in the thread of the profile request.
+Gunicorn workers need threads (gthread) for other requests to be sampled
+while the profile request waits. Conversions run in sandbox worker
+processes: a job started while a profile is active runs a StackSampler in
+its worker, and the stacks it streams back are merged into the profile under
+the route and stage that waits for the job, followed by "sandbox pid N".
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import request
+
+MAX_SECONDS = 60
+MAX_RATE = 1000
+
+# Thread id -> [route, stage] for threads serving a request
+_tags = {}
+_labels = {}
+_profile_lock = threading.Lock()
+# Profile being taken in this process: {'rate', 'deadline', 'stacks' merged from elsewhere}
+_active = None
+_merge_lock = threading.Lock()
+# Seconds between partial results sent by a StackSampler
+FLUSH_INTERVAL = 0.5
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is already being taken in this process."""
+
+
+def install(app):
+    """Record the route of each request so samples can be attributed to it."""
+
+    @app.before_request
+    def _tag_request():
+        rule = request.url_rule
+        _tags[threading.get_ident()] = [rule.rule if rule else request.path, None]
+
+    @app.teardown_request
+    def _untag_request(exc=None):
+        _tags.pop(threading.get_ident(), None)
+
+
+@contextmanager
+def stage(name):
+    """Tag samples of the current request thread with a processing stage."""
+    tags = _tags.get(threading.get_ident())
+    if tags is None:
+        yield
+        return
+    previous, tags[1] = tags[1], name
+    try:
+        yield
+    finally:
+        tags[1] = previous
+
+
+def _label(code):
+    label = _labels.get(code)
+    if label is None:
+        name = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        # ';' separates frames and the last space the count in collapsed stacks
+        label = _labels[code] = name.replace(';', ':')
+    return label
+
+
+def _frames(frame):
+    """Labels of a stack, outermost frame first."""
+    frames = []
+    while frame is not None:
+        frames.append(_label(frame.f_code))
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _tag_prefix(tags):
+    return [f"route {tags[0]}"] + ([f"stage {tags[1]}"] if tags[1] else [])
+
+
+def thread_prefix():
+    """Route and stage of the current thread, as prefixed to its samples."""
+    tags = _tags.get(threading.get_ident())
+    if tags is None:
+        return [f"thread {threading.current_thread().name}"]
+    return _tag_prefix(tags)
+
+
+def active():
+    """(rate, seconds left) of the profile being taken in this process, or None."""
+    profile = _active
+    if profile is None:
+        return None
+    left = profile['deadline'] - time.monotonic()
+    return (profile['rate'], left) if left > 0 else None
+
+
+def merge(prefix, stacks):
+    """
+    Add stacks sampled in another process to the active profile, under prefix.
+
+    Stacks that arrive after the profile ended are dropped.
+    """
+    with _merge_lock:
+        if _active is None:
+            return
+        for stack, count in stacks.items():
+            _active['stacks'][';'.join(prefix + [stack])] += count
+
+
+def sample(seconds, rate, all_threads=False):
+    """Sample stacks for seconds at rate per second; returns (Counter of stacks, samples taken)."""
+    if not 0 < seconds <= MAX_SECONDS:
+        raise ValueError(f"seconds must be between 0 and {MAX_SECONDS}")
+    if not 0 < rate <= MAX_RATE:
+        raise ValueError(f"rate must be between 0 and {MAX_RATE}")
+    global _active
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this worker")
+
+    try:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = Counter()
+        interval = 1.0 / rate
+        samples = 0
+        next_sample = time.monotonic()
+        deadline = next_sample + seconds
+        with _merge_lock:
+            _active = {'rate': rate, 'deadline': deadline, 'stacks': Counter()}
+        while next_sample < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                tags = _tags.get(ident)
+                if tags is None:
+                    if not all_threads:
+                        continue
+                    prefix = [f"thread {names.get(ident, ident)}"]
+                else:
+                    prefix = _tag_prefix(tags)
+                stacks[';'.join(prefix + _frames(frame))] += 1
+            samples += 1
+            next_sample += interval
+            delay = next_sample - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Sampling cannot keep up; skip the missed ticks
+                next_sample = time.monotonic()
+        with _merge_lock:
+            stacks.update(_active['stacks'])
+            _active = None
+        return stacks, samples
+    finally:
+        with _merge_lock:
+            _active = None
+        _profile_lock.release()
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples one thread of this process for a sandbox job.
+
+    Partial results go to flush (a dict of collapsed stacks without prefix)
+    every FLUSH_INTERVAL seconds and once more when sampling ends.
+    """
+
+    def __init__(self, ident, rate, seconds, flush):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.ident_sampled = ident
+        self.rate = rate
+        self.seconds = seconds
+        self.flush = flush
+        self._done = threading.Event()
+
+    def run(self):
+        stacks = Counter()
+        interval = 1.0 / self.rate
+        next_sample = last_flush = time.monotonic()
+        deadline = next_sample + self.seconds
+        while next_sample < deadline and not self._done.is_set():
+            frame = sys._current_frames().get(self.ident_sampled)
+            if frame is not None:
+                stacks[';'.join(_frames(frame))] += 1
+            next_sample += interval
+            now = time.monotonic()
+            if stacks and now - last_flush >= FLUSH_INTERVAL:
+                self.flush(dict(stacks))
+                stacks.clear()
+                last_flush = now
+            delay = next_sample - now
+            if delay > 0:
+                self._done.wait(delay)
+            else:
+                next_sample = now
+        if stacks:
+            self.flush(dict(stacks))
+
+    def stop(self):
+        """Stop sampling and wait for the last flush."""
+        self._done.set()
+        self.join()
+
+
+def collapse(stacks):
+    """Collapsed stack text, one 'frame;frame;... count' line per stack."""
+    return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
@@ -0,0 +1,201 @@
+"""
+AutoCad_Buddy - Sandboxed conversion workers
+Conversions run in separate worker processes so a malformed or oversized
+drawing cannot exhaust the memory of the API process. Each worker has an
+address space limit (RLIMIT_AS) and a CPU time budget per job (RLIMIT_CPU),
+every job has a wall-clock timeout, and workers are replaced after a fixed
+number of jobs so fragmentation and leaks do not accumulate.
+
+Exceptions raised by the conversion are re-raised in the caller unchanged.
+Jobs that break a limit or kill their worker raise ConversionFailed.
+
+Jobs started while a profile is active in the API process are sampled in
+their worker, and the stacks are merged into that profile (see profiler).
+"""
+
+import os
+import time
+import signal
+import logging
+import resource
+import threading
+import traceback
+import multiprocessing
+
+import profiler
+
+logger = logging.getLogger('AutoCad_Buddy_API')
+
+# Workers kept alive between jobs, per API process
+MAX_IDLE_WORKERS = 2
+# Process name of sandbox workers
+WORKER_NAME = 'conversion-sandbox'
+# Seconds a worker gets to exit after being asked to
+SHUTDOWN_TIMEOUT = 2
+
+
+class ConversionFailed(Exception):
+    """Raised when a sandboxed conversion hits a limit or its worker dies."""
+
+    def __init__(self, code, message, status_code=500):
+        super().__init__(message)
+        self.code = code
+        self.status_code = status_code
+
+
+def in_worker():
+    """
+    True in a sandbox worker, including while it re-imports the __main__
+    module of the API process, as spawned processes do before their first job.
+    """
+    return multiprocessing.current_process().name == WORKER_NAME
+
+
+def _set_cpu_budget(seconds):
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = int(usage.ru_utime + usage.ru_stime) + seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(connection, memory_limit):
+    """Worker process loop: run jobs received on connection until it closes."""
+    if memory_limit:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, hard))
+    while True:
+        try:
+            func, args, kwargs, cpu_limit, profile = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if cpu_limit:
+            _set_cpu_budget(cpu_limit)
+        sampler = None
+        if profile:
+            rate, seconds = profile
+            sampler = profiler.StackSampler(threading.get_ident(), rate, seconds,
+                                            lambda stacks: connection.send(('stacks', stacks)))
+            sampler.start()
+        try:
+            result = ('ok', func(*args, **kwargs))
+        except MemoryError:
+            result = ('failed', 'memory_limit', "Conversion exceeded the memory limit")
+        except Exception as e:
+            result = ('raised', e, traceback.format_exc())
+        if sampler:
+            # The sampler sends its last stacks before the result, never concurrently with it
+            sampler.stop()
+        try:
+            connection.send(result)
+        except Exception:
+            # Exceptions that cannot be pickled are reported by type and message
+            connection.send(('failed', 'conversion_error', f"{type(result[1]).__name__}: {result[1]}"))
+
+
+class _Worker:
+    def __init__(self, context, memory_limit):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection, memory_limit),
+                                       name=WORKER_NAME, daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.jobs = 0
+
+    def stop(self, kill=False):
+        self.connection.close()
+        if kill:
+            self.process.kill()
+        self.process.join(SHUTDOWN_TIMEOUT)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+class ConversionSandbox:
+    """Pool of limited worker processes that run conversion functions."""
+
+    def __init__(self, memory_limit=2 * 1024 ** 3, cpu_limit=120, timeout=300, max_jobs=20):
+        self.memory_limit = memory_limit
+        self.cpu_limit = cpu_limit
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        # Spawned workers do not inherit the threads and sockets of the API process
+        self._context = multiprocessing.get_context('spawn')
+        self._lock = threading.Lock()
+        self._idle = []
+        self._pid = os.getpid()
+
+    def _checkout(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Workers belong to the process that started them
+                self._idle = []
+                self._pid = os.getpid()
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+        return _Worker(self._context, self.memory_limit)
+
+    def _checkin(self, worker):
+        if worker.jobs >= self.max_jobs:
+            worker.stop()
+            return
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < MAX_IDLE_WORKERS:
+                self._idle.append(worker)
+                return
+        worker.stop()
+
+    def _failure(self, worker):
+        worker.process.join(SHUTDOWN_TIMEOUT)
+        exitcode = worker.process.exitcode
+        if exitcode == -signal.SIGXCPU:
+            return ConversionFailed('cpu_limit', f"Conversion exceeded the CPU time limit of {self.cpu_limit}s", 422)
+        if exitcode == -signal.SIGKILL:
+            # Usually the kernel OOM killer
+            return ConversionFailed('worker_killed', "Conversion worker was killed", 422)
+        return ConversionFailed('worker_crashed', f"Conversion worker exited unexpectedly ({exitcode})")
+
+    def run(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) in a sandboxed worker and return its result."""
+        profile = profiler.active()
+        prefix = profiler.thread_prefix() if profile else None
+        worker = self._checkout()
+        healthy = False
+        try:
+            worker.connection.send((func, args, kwargs, self.cpu_limit, profile))
+            worker.jobs += 1
+            deadline = time.monotonic() + self.timeout
+            while True:
+                if not worker.connection.poll(max(0, deadline - time.monotonic())):
+                    raise ConversionFailed('timeout', f"Conversion did not finish within {self.timeout}s", 504)
+                try:
+                    result = worker.connection.recv()
+                except (EOFError, OSError):
+                    raise self._failure(worker)
+                if result[0] != 'stacks':
+                    break
+                profiler.merge(prefix + [f"sandbox pid {worker.process.pid}"], result[1])
+            # A job that hit a limit may have left the worker in a bad state
+            healthy = result[0] != 'failed'
+        finally:
+            if healthy:
+                self._checkin(worker)
+            else:
+                worker.stop(kill=True)
+
+        if result[0] == 'ok':
+            return result[1]
+        if result[0] == 'raised':
+            logger.debug(f"Sandboxed conversion raised:\n{result[2]}")
+            raise result[1]
+        raise ConversionFailed(result[1], result[2], 422 if result[1] == 'memory_limit' else 500)
+
+    def shutdown(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
@@ -0,0 +1,83 @@
+"""
+AutoCad_Buddy - Host-wide state in SQLite
+Limiters that must hold across every gunicorn worker on the host (admission
+control, password hashing) keep their counters in a SQLite database on local
+disk. SharedState owns the connection of each process and runs write
+transactions with BEGIN IMMEDIATE, so read-check-update sequences are atomic
+across workers; WAL mode keeps plain reads from blocking on writers.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Seconds to wait for the database lock before answering busy
+LOCK_TIMEOUT = 1.0
+
+
+class SharedState:
+    """SQLite database shared by the worker processes of the host."""
+
+    def __init__(self, path, schema):
+        self.path = path
+        self.schema = schema
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def _connect(self):
+        # SQLite connections must not be shared with forked children
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            for statement in self.schema:
+                connection.execute(statement)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    @contextmanager
+    def connection(self):
+        """The connection of this process, for reads and single statements."""
+        with self._lock:
+            yield self._connect()
+
+    @contextmanager
+    def transaction(self, busy, commit_on=()):
+        """
+        Write transaction on the connection of this process.
+
+        Raises busy when another worker holds the database for longer than
+        LOCK_TIMEOUT. Exceptions of the commit_on types keep the work done so
+        far, such as purges and counters, before propagating; any other
+        exception rolls it back.
+        """
+        with self._lock:
+            connection = self._connect()
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError:
+                raise busy
+            try:
+                yield connection
+            except commit_on:
+                connection.execute("COMMIT")
+                raise
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+
+def process_alive(pid):
+    """Whether a process with this pid exists, as seen from this process."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,115 @@
+"""
+AutoCad_Buddy - Polyline simplification
+Vectorized Douglas-Peucker simplification applied to 2D outlines before they
+are extruded, with a per-model triangle budget that raises the tolerance.
+"""
+
+import numpy as np
+
+# Upper bound on tolerance doublings when enforcing a triangle budget
+MAX_BUDGET_ITERATIONS = 32
+# Starting tolerance (fraction of the drawing diagonal) when none was requested
+BUDGET_START_FRACTION = 1e-5
+# Bisection steps used to tighten the tolerance once the budget is met
+BUDGET_REFINE_ITERATIONS = 6
+
+
+class TriangleBudgetExceeded(ValueError):
+    """Raised when a drawing cannot be simplified below the triangle budget."""
+
+
+def _segment_distances(points, start, end):
+    """Distances of points to the segment start-end (or to start if it is degenerate)."""
+    direction = end - start
+    length_sq = float(np.dot(direction, direction))
+    offsets = points - start
+    if length_sq == 0.0:
+        return np.hypot(offsets[:, 0], offsets[:, 1])
+    t = np.clip(offsets @ direction / length_sq, 0.0, 1.0)
+    nearest = start + t[:, None] * direction
+    delta = points - nearest
+    return np.hypot(delta[:, 0], delta[:, 1])
+
+
+def simplify_polyline(points, tolerance):
+    """
+    Simplify a polyline with the Douglas-Peucker algorithm.
+
+    The endpoints are always kept, so closed outlines stay closed. Each split
+    step measures all points of the current span in a single numpy call.
+    """
+    points = np.asarray(points, dtype=float)
+    if tolerance <= 0 or len(points) < 3:
+        return points
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = _segment_distances(points[first + 1:last], points[first], points[last])
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = first + 1 + index
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return points[keep]
+
+
+def wall_triangle_count(points):
+    """Number of triangles produced by extruding a polyline into walls."""
+    return max(len(points) - 1, 0) * 2
+
+
+def _total(outlines, weights):
+    if weights is None:
+        return sum(wall_triangle_count(outline) for outline in outlines)
+    return sum(wall_triangle_count(outline) * weight for outline, weight in zip(outlines, weights))
+
+
+def simplify_outlines(outlines, tolerance=0.0, max_triangles=None, weights=None):
+    """
+    Simplify a list of outlines, raising the tolerance until the extruded model fits max_triangles.
+
+    weights optionally multiplies the wall triangle count of each outline, for
+    outlines that are also capped. Returns a tuple of (simplified_outlines,
+    effective_tolerance).
+    """
+    simplified = [simplify_polyline(outline, tolerance) for outline in outlines]
+    if max_triangles is None:
+        return simplified, tolerance
+
+    total = _total(simplified, weights)
+    if total <= max_triangles:
+        return simplified, tolerance
+
+    if tolerance <= 0:
+        non_empty = [np.asarray(outline, dtype=float) for outline in outlines if len(outline)]
+        stacked = np.concatenate(non_empty)
+        diagonal = float(np.hypot(*(stacked.max(axis=0) - stacked.min(axis=0))))
+        tolerance = max(diagonal * BUDGET_START_FRACTION, np.finfo(float).eps)
+
+    for _ in range(MAX_BUDGET_ITERATIONS):
+        lower, tolerance = tolerance, tolerance * 2
+        simplified = [simplify_polyline(outline, tolerance) for outline in outlines]
+        total = _total(simplified, weights)
+        if total <= max_triangles:
+            break
+    else:
+        raise TriangleBudgetExceeded(
+            f"Model needs at least {total} triangles, exceeding the budget of {max_triangles}"
+        )
+
+    # Doubling overshoots; bisect back towards the finest tolerance that still fits
+    upper = tolerance
+    for _ in range(BUDGET_REFINE_ITERATIONS):
+        middle = (lower + upper) / 2
+        candidate = [simplify_polyline(outline, middle) for outline in outlines]
+        if _total(candidate, weights) <= max_triangles:
+            upper, simplified = middle, candidate
+        else:
+            lower = middle
+    return simplified, upper
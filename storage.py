@@ -0,0 +1,63 @@
+"""
+AutoCad_Buddy - User and model storage
+Storage backends hold user accounts and converted model records. The API
+only talks to the Storage interface, so a database backend can replace the
+in-memory one without touching the routes.
+"""
+
+import threading
+
+
+class Storage:
+    """Interface for user and model records (plain dicts)."""
+
+    def get_user(self, email):
+        """Return the user with this email, or None."""
+        raise NotImplementedError
+
+    def add_user(self, user):
+        """Store a new user; return False if the email is already registered."""
+        raise NotImplementedError
+
+    def get_model(self, model_id):
+        """Return the model with this id, or None."""
+        raise NotImplementedError
+
+    def add_model(self, model, email):
+        """Store a model and append it to the models of its owner."""
+        raise NotImplementedError
+
+    def user_models(self, email):
+        """Models of a user, oldest first."""
+        user = self.get_user(email)
+        if not user:
+            return []
+        models = [self.get_model(model_id) for model_id in user['models']]
+        return [model for model in models if model]
+
+
+class MemoryStorage(Storage):
+    """Records kept in process memory; lost on restart and not shared between workers."""
+
+    def __init__(self):
+        self.users = {}
+        self.models = {}
+        self._lock = threading.Lock()
+
+    def get_user(self, email):
+        return self.users.get(email)
+
+    def add_user(self, user):
+        with self._lock:
+            if user['email'] in self.users:
+                return False
+            self.users[user['email']] = user
+            return True
+
+    def get_model(self, model_id):
+        return self.models.get(model_id)
+
+    def add_model(self, model, email):
+        with self._lock:
+            self.models[model['id']] = model
+            self.users[email]['models'].append(model['id'])
@@ -0,0 +1,102 @@
+"""
+AutoCad_Buddy - SVG simplification
+Flattens the paths of an SVG upload into polylines and simplifies them to the
+triangle budget before the drawing is handed to the converter, so the size of
+the converter's input, and with it its run time and output, is bounded.
+"""
+
+import math
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+import simplify
+
+SVG_NAMESPACE = 'http://www.w3.org/2000/svg'
+# Chord step when flattening curves, as a fraction of the drawing diagonal
+FLATTENING_FRACTION = 1e-3
+# Upper bound on points sampled from a single curve segment
+MAX_SEGMENT_POINTS = 256
+# Root attributes that place the drawing on the page
+ROOT_ATTRIBUTES = ('width', 'height', 'viewBox', 'preserveAspectRatio')
+# Presentation attributes carried over to the simplified paths, inherited from groups
+STYLE_ATTRIBUTES = ('fill', 'fill-rule', 'stroke', 'stroke-width', 'style')
+
+
+def _bounds(paths):
+    boxes = np.array([path.bbox() for path in paths if len(path)], dtype=float)
+    if not len(boxes):
+        return 0.0
+    return float(math.hypot(boxes[:, 1].max() - boxes[:, 0].min(), boxes[:, 3].max() - boxes[:, 2].min()))
+
+
+def _flatten(subpath, step):
+    """Points of a continuous subpath, with curves sampled every step units."""
+    from svgpathtools import Line
+
+    points = [subpath[0].start]
+    for segment in subpath:
+        if isinstance(segment, Line) or step <= 0:
+            count = 1
+        else:
+            count = min(max(math.ceil(segment.length() / step), 1), MAX_SEGMENT_POINTS)
+        points.extend(segment.point(i / count) for i in range(1, count + 1))
+    return [(point.real, point.imag) for point in points]
+
+
+def _style(element, parents):
+    """Presentation attributes of element, including those inherited from its groups."""
+    style = {}
+    while element is not None:
+        for name in STYLE_ATTRIBUTES:
+            if name not in style and element.get(name) is not None:
+                style[name] = element.get(name)
+        element = parents.get(element)
+    return style
+
+
+def _path_data(points, closed):
+    points = points[:-1] if closed and len(points) > 1 else points
+    data = 'M ' + ' L '.join(f"{x!r},{y!r}" for x, y in points)
+    return data + ' Z' if closed else data
+
+
+def simplify_svg(input_path, output_path, tolerance=0.0, max_triangles=None):
+    """
+    Write a simplified copy of an SVG drawing; return the effective tolerance.
+
+    Transforms are applied, so the copy holds one path of straight segments
+    per outline with the fill and stroke of its source element. The budget
+    counts the wall triangles of each outline, like simplify.simplify_outlines;
+    the converter may add caps, so its output is still checked afterwards.
+    Raises simplify.TriangleBudgetExceeded if the drawing cannot fit.
+    """
+    from svgpathtools import Document
+
+    document = Document(input_path)
+    parents = {child: parent for parent in document.tree.iter() for child in parent}
+    # Paths come back in root coordinates, each with the element it was parsed from
+    paths = document.paths()
+    step = _bounds(paths) * FLATTENING_FRACTION
+
+    outlines, closed, styles = [], [], []
+    for path in paths:
+        style = _style(path.element, parents)
+        for subpath in path.continuous_subpaths():
+            if not len(subpath):
+                continue
+            outlines.append(_flatten(subpath, step))
+            closed.append(subpath.isclosed())
+            styles.append(style)
+
+    if outlines:
+        outlines, tolerance = simplify.simplify_outlines(outlines, tolerance, max_triangles)
+
+    root = ET.Element('svg', {name: document.root.get(name) for name in ROOT_ATTRIBUTES
+                              if document.root.get(name) is not None})
+    root.set('xmlns', SVG_NAMESPACE)
+    for points, is_closed, style in zip(outlines, closed, styles):
+        if len(points) >= 2:
+            ET.SubElement(root, 'path', dict(style, d=_path_data(points.tolist(), is_closed)))
+    ET.ElementTree(root).write(output_path, encoding='utf-8', xml_declaration=True)
+    return tolerance
@@ -0,0 +1,156 @@
+import io
+import subprocess
+import sys
+
+import pytest
+
+import admission
+
+MB = 1024 * 1024
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission.time, 'time', clock)
+    return clock
+
+
+def controller(tmp_path, **kwargs):
+    options = dict(rate=0.5, burst=3, capacity=8, user_capacity=4, weight_unit=4 * MB)
+    options.update(kwargs)
+    return admission.AdmissionController(str(tmp_path / 'admission.sqlite3'), **options)
+
+
+def admit_and_release(control, identity='alice', size=1):
+    control.admit(identity, size).release()
+
+
+def test_burst_then_rate_limited(tmp_path, clock):
+    control = controller(tmp_path)
+    for _ in range(3):
+        admit_and_release(control)
+    with pytest.raises(admission.AdmissionRejected) as rejected:
+        admit_and_release(control)
+    assert rejected.value.status_code == 429
+    # One token takes 1 / rate seconds to refill
+    assert rejected.value.retry_after == 2
+
+
+def test_bucket_refills_over_time(tmp_path, clock):
+    control = controller(tmp_path)
+    for _ in range(3):
+        admit_and_release(control)
+    clock.now += 1.0
+    with pytest.raises(admission.AdmissionRejected):
+        admit_and_release(control)
+    clock.now += 1.0
+    admit_and_release(control)
+    with pytest.raises(admission.AdmissionRejected):
+        admit_and_release(control)
+
+
+def test_refill_is_capped_at_burst(tmp_path, clock):
+    control = controller(tmp_path)
+    admit_and_release(control)
+    clock.now += 3600
+    for _ in range(3):
+        admit_and_release(control)
+    with pytest.raises(admission.AdmissionRejected):
+        admit_and_release(control)
+
+
+def test_buckets_are_per_identity(tmp_path, clock):
+    control = controller(tmp_path, burst=1)
+    admit_and_release(control, 'alice')
+    admit_and_release(control, 'bob')
+    with pytest.raises(admission.AdmissionRejected):
+        admit_and_release(control, 'alice')
+
+
+def test_state_is_shared_between_controllers(tmp_path, clock):
+    first, second = controller(tmp_path, burst=2), controller(tmp_path, burst=2)
+    admit_and_release(first)
+    admit_and_release(second)
+    with pytest.raises(admission.AdmissionRejected):
+        admit_and_release(first)
+
+
+def test_weight_is_rounded_up_and_capped():
+    control = admission.AdmissionController('unused', capacity=8, user_capacity=4, weight_unit=4 * MB)
+    assert control.weight(0) == 1
+    assert control.weight(4 * MB) == 1
+    assert control.weight(4 * MB + 1) == 2
+    assert control.weight(1024 * MB) == 4
+
+
+def test_user_capacity(tmp_path, clock):
+    control = controller(tmp_path, burst=10)
+    held = control.admit('alice', 12 * MB)  # 3 slots
+    with pytest.raises(admission.AdmissionRejected) as rejected:
+        control.admit('alice', 8 * MB)
+    assert rejected.value.status_code == 429
+    control.admit('bob', 8 * MB).release()
+    held.release()
+    control.admit('alice', 8 * MB).release()
+
+
+def test_host_capacity(tmp_path, clock):
+    control = controller(tmp_path, burst=10)
+    slots = [control.admit('alice', 16 * MB), control.admit('bob', 12 * MB)]
+    with pytest.raises(admission.AdmissionRejected) as rejected:
+        control.admit('carol', 8 * MB)
+    assert rejected.value.status_code == 503
+    assert control.stats() == {'capacity': 8, 'in_use': 7, 'running': 2}
+    slots[0].release()
+    with control.admit('carol', 8 * MB):
+        assert control.stats()['in_use'] == 5
+
+
+def test_rejection_at_capacity_does_not_spend_tokens(tmp_path, clock):
+    control = controller(tmp_path, burst=1, capacity=1, user_capacity=1)
+    held = control.admit('bob', 1)
+    with pytest.raises(admission.AdmissionRejected):
+        control.admit('alice', 1)
+    held.release()
+    admit_and_release(control, 'alice')
+
+
+def test_slots_of_dead_processes_are_purged(tmp_path, clock):
+    control = controller(tmp_path, burst=10, capacity=1, user_capacity=1)
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    with control.state.connection() as connection:
+        connection.execute("INSERT INTO slots (identity, weight, pid, started) VALUES ('bob', 1, ?, ?)",
+                           (dead.pid, clock.now))
+    admit_and_release(control)
+
+
+def test_expired_slots_are_purged(tmp_path, clock):
+    control = controller(tmp_path, burst=10, capacity=1, user_capacity=1)
+    control.admit('bob', 1)  # leaked, never released
+    clock.now += admission.SLOT_TTL + 1
+    admit_and_release(control)
+
+
+def test_chunked_uploads_are_weighted_as_the_largest_request(tmp_path):
+    from app_factory import create_app, services
+    app = create_app({'UPLOAD_FOLDER': str(tmp_path), 'MAX_CONTENT_LENGTH': 16 * MB,
+                      'CONVERT_CAPACITY': 4, 'CONVERT_USER_CAPACITY': 4, 'CONVERT_WEIGHT_UNIT': 4 * MB})
+    client = app.test_client()
+    token = client.post('/api/register', json={'email': 'a@example.com', 'password': 'secret'}).json['access_token']
+    with app.app_context():
+        held = services().admission.admit('bob', 1)
+    response = client.post('/api/convert', headers={'Authorization': f"Bearer {token}",
+                                                    'Transfer-Encoding': 'chunked'},
+                           input_stream=io.BytesIO(b''), content_type='multipart/form-data; boundary=x')
+    held.release()
+    assert response.status_code == 503
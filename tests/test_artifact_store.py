@@ -0,0 +1,45 @@
+import pytest
+
+import artifact_store
+from app_factory import create_app, services
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'UPLOAD_FOLDER': str(tmp_path), 'ARTIFACT_DELIVERY': 'signed-url',
+                      'ARTIFACT_SIGNED_DELIVERY': 'x-accel-redirect'})
+    source = tmp_path / 'model.stl'
+    source.write_bytes(b'solid model\nendsolid model\n')
+    with app.app_context():
+        services().artifacts.put('model.stl', str(source))
+    return app
+
+
+def signed(app, name):
+    with app.app_context():
+        return artifact_store.signed_url('model.stl', download_name=name)
+
+
+def test_download_name_is_quoted(app):
+    response = app.test_client().get(signed(app, 'plan "v2".stl'))
+    assert response.status_code == 200
+    assert response.headers['X-Accel-Redirect'] == '/protected-artifacts/model.stl'
+    assert response.headers['Content-Disposition'] == 'attachment; filename="plan \\"v2\\".stl"'
+
+
+def test_non_ascii_download_name(app):
+    response = app.test_client().get(signed(app, 'Küche.stl'))
+    assert response.headers['Content-Disposition'] == "attachment; filename=Kuche.stl; filename*=UTF-8''K%C3%BCche.stl"
+
+
+def test_download_name_is_signed(app):
+    url = signed(app, 'plan.stl')
+    client = app.test_client()
+    assert client.get(url.replace('name=plan.stl', 'name=other.stl')).status_code == 403
+    assert client.get(url.replace('&name=plan.stl', '')).status_code == 403
+    assert client.get(url).status_code == 200
+
+
+def test_unknown_delivery_mode_fails_at_startup(tmp_path):
+    with pytest.raises(ValueError):
+        create_app({'UPLOAD_FOLDER': str(tmp_path), 'ARTIFACT_DELIVERY': 'x-accel'})
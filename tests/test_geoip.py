@@ -0,0 +1,62 @@
+import pytest
+
+import geoip
+
+
+def database(tmp_path, text, csv_format):
+    path = tmp_path / 'ranges.csv'
+    path.write_text(text)
+    return geoip.GeoIPDatabase(str(path), csv_format)
+
+
+def test_simple_format(tmp_path):
+    db = database(tmp_path, "range_start,range_end,country,region,city\n"
+                            "1.0.0.0,1.0.0.255,au,Queensland,Brisbane\n"
+                            "2001:db8::,2001:db8::ffff,de\n", 'simple')
+    assert db.lookup('1.0.0.7') == ('AU', 'Queensland', 'Brisbane')
+    assert db.lookup('2001:db8::1') == ('DE', '', '')
+    assert db.lookup('1.0.1.0') is None
+
+
+def test_dbip_city_skips_the_continent(tmp_path):
+    db = database(tmp_path, "1.0.0.0,1.0.0.255,OC,AU,Queensland,South Brisbane,-27.4748,153.017\n", 'dbip-city')
+    assert db.lookup('1.0.0.1') == ('AU', 'Queensland', 'South Brisbane')
+
+
+def test_dbip_country(tmp_path):
+    db = database(tmp_path, "1.0.0.0,1.0.0.255,AU\n", 'dbip-country')
+    assert db.lookup('1.0.0.1') == ('AU', '', '')
+
+
+def test_ip2location_uses_the_country_code_and_skips_the_name(tmp_path):
+    db = database(tmp_path, '"16777216","16777471","AU","Australia","Queensland","Brisbane"\n'
+                            '"16777472","16778239","-","-","-","-"\n', 'ip2location')
+    assert db.lookup('1.0.0.1') == ('AU', 'Queensland', 'Brisbane')
+    assert db.lookup('1.0.1.1') is None
+
+
+def test_ip2location_db1_has_no_region(tmp_path):
+    db = database(tmp_path, '"16777216","16777471","AU","Australia"\n', 'ip2location')
+    assert db.lookup('1.0.0.1') == ('AU', '', '')
+
+
+def test_ipv4_mapped_ranges_serve_ipv4_lookups(tmp_path):
+    mapped = 0xFFFF00000000
+    db = database(tmp_path, f'"0","{mapped - 1}","-","-","-","-"\n'
+                            f'"{mapped + 16777216}","{mapped + 16777471}","AU","Australia","Queensland","Brisbane"\n'
+                            f'"{0x20010DB8 << 96}","{(0x20010DB8 << 96) + 0xFFFF}","DE","Germany","Berlin","Berlin"\n',
+                  'ip2location')
+    assert db.lookup('1.0.0.1') == ('AU', 'Queensland', 'Brisbane')
+    assert db.lookup('::ffff:1.0.0.1') == ('AU', 'Queensland', 'Brisbane')
+    assert db.lookup('2001:db8::2') == ('DE', 'Berlin', 'Berlin')
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        geoip.GeoIPDatabase(str(tmp_path / 'ranges.csv'), 'maxmind')
+
+
+def test_missing_file_resolves_nothing(tmp_path):
+    db = geoip.GeoIPDatabase(str(tmp_path / 'missing.csv'))
+    db.load()
+    assert db.lookup('1.0.0.1') is None
@@ -0,0 +1,93 @@
+import math
+
+import numpy as np
+import pytest
+
+ezdxf = pytest.importorskip('ezdxf')
+
+import incremental
+
+
+def save_drawing(path, edit=None):
+    doc = ezdxf.new()
+    chair = doc.blocks.new('CHAIR')
+    chair.add_lwpolyline([(0, 0), (45, 0), (45, 50), (0, 50)], close=True)
+    msp = doc.modelspace()
+    msp.add_lwpolyline([(0, 0), (1000, 0), (1000, 800), (0, 800)], close=True)
+    hatch = msp.add_hatch()
+    hatch.paths.add_polyline_path([(100, 100), (300, 100), (300, 300), (100, 300)], is_closed=True)
+    msp.add_blockref('CHAIR', (500, 500), dxfattribs={'rotation': 90})
+    if edit:
+        edit(doc)
+    doc.saveas(path)
+    return str(path)
+
+
+def test_hashes_are_stable_across_saves(tmp_path):
+    first = save_drawing(tmp_path / 'a.dxf')
+    second = save_drawing(tmp_path / 'b.dxf')
+    _, hashes_a, _ = incremental.convert_revision(first, str(tmp_path / 'a.stl'), cache=incremental.GeometryCache())
+    _, hashes_b, _ = incremental.convert_revision(second, str(tmp_path / 'b.stl'), cache=incremental.GeometryCache())
+    assert hashes_a == hashes_b
+
+
+def test_unchanged_revision_reuses_every_mesh(tmp_path):
+    cache = incremental.GeometryCache()
+    _, hashes, first = incremental.convert_revision(save_drawing(tmp_path / 'a.dxf'), str(tmp_path / 'a.stl'),
+                                                    cache=cache)
+    _, _, second = incremental.convert_revision(save_drawing(tmp_path / 'b.dxf'), str(tmp_path / 'b.stl'),
+                                                hashes, cache=cache)
+    assert first['remeshed'] == 3
+    assert second['reused'] == 3 and second['remeshed'] == 0
+    assert (tmp_path / 'a.stl').read_bytes() == (tmp_path / 'b.stl').read_bytes()
+
+
+def test_block_references_are_meshed(tmp_path):
+    path = save_drawing(tmp_path / 'a.dxf')
+    doc = ezdxf.readfile(path)
+    insert = doc.modelspace().query('INSERT')[0]
+    # Four walls of two triangles each
+    assert len(incremental.mesh_entity(insert)) == 8
+
+
+def test_editing_a_block_changes_its_references(tmp_path):
+    cache = incremental.GeometryCache()
+    _, hashes, first = incremental.convert_revision(save_drawing(tmp_path / 'a.dxf'), str(tmp_path / 'a.stl'),
+                                                    cache=cache)
+    edited = save_drawing(tmp_path / 'b.dxf', lambda doc: doc.blocks.get('CHAIR').add_line((0, 0), (45, 50)))
+    _, _, stats = incremental.convert_revision(edited, str(tmp_path / 'b.stl'), hashes, cache=cache)
+    assert stats['added_or_changed'] == 1 and stats['removed'] == 1
+    # The added line becomes one wall of two triangles
+    assert stats['triangles'] == first['triangles'] + 2
+
+
+def test_budget_caches_only_the_final_tolerance(tmp_path):
+    def add_circles(doc):
+        for k in range(10):
+            doc.modelspace().add_lwpolyline(
+                [(2000 + k * 300 + 100 * math.cos(t / 50 * 2 * math.pi), 100 * math.sin(t / 50 * 2 * math.pi))
+                 for t in range(51)])
+
+    path = save_drawing(tmp_path / 'a.dxf', add_circles)
+    cache = incremental.GeometryCache()
+    _, _, stats = incremental.convert_revision(path, str(tmp_path / 'a.stl'), max_triangles=400, cache=cache)
+    assert stats['triangles'] <= 400
+    assert stats['tolerance'] > 0
+    assert len(cache) == stats['entities']
+
+
+def test_shared_cache_is_visible_to_other_instances(tmp_path):
+    mesh = np.arange(9, dtype=np.float32).reshape(1, 3, 3)
+    incremental.SharedGeometryCache(str(tmp_path)).put('key', mesh)
+    assert np.array_equal(incremental.SharedGeometryCache(str(tmp_path)).get('key'), mesh)
+    assert incremental.SharedGeometryCache(str(tmp_path)).get('other') is None
+
+
+def test_memory_cache_is_bounded_in_bytes():
+    cache = incremental.GeometryCache(max_bytes=1000)
+    for i in range(10):
+        cache.put(i, np.zeros((1, 3, 3), dtype=np.float32))  # 36 bytes
+    cache.put('large', np.zeros((10, 3, 3), dtype=np.float32))  # 360 bytes
+    assert cache.nbytes <= 1000
+    cache.put('too large', np.zeros((100, 3, 3), dtype=np.float32))
+    assert cache.get('too large') is None
@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import password_hashing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HOLD_SLOT = """
+import sys, time
+import password_hashing
+limiter = password_hashing.HashingLimiter(sys.argv[1], max_workers=1, max_queue=0)
+limiter.run(lambda: (print('running', flush=True), time.sleep(30)))
+"""
+
+
+def limiter(tmp_path, **kwargs):
+    return password_hashing.HashingLimiter(str(tmp_path / 'hashing.sqlite3'), **kwargs)
+
+
+def hold(control):
+    """Run an operation that blocks until the returned event is set."""
+    started, finish = threading.Event(), threading.Event()
+
+    def operation():
+        started.set()
+        finish.wait(10)
+
+    thread = threading.Thread(target=control.run, args=(operation,))
+    thread.start()
+    started.wait(10)
+    return finish, thread
+
+
+def test_full_queue_is_rejected(tmp_path):
+    control = limiter(tmp_path, max_workers=1, max_queue=0)
+    finish, thread = hold(control)
+    with pytest.raises(password_hashing.HashingBusy):
+        control.run(lambda: None)
+    finish.set()
+    thread.join()
+    assert control.run(lambda: 42) == 42
+    stats = control.stats()
+    assert (stats['completed'], stats['rejected'], stats['running']) == (2, 1, 0)
+
+
+def test_waiting_operation_runs_when_a_slot_frees(tmp_path):
+    control = limiter(tmp_path, max_workers=1, max_queue=1)
+    finish, thread = hold(control)
+    threading.Timer(0.1, finish.set).start()
+    assert control.run(lambda: 'done') == 'done'
+    thread.join()
+
+
+def test_waiting_operation_times_out(tmp_path):
+    control = limiter(tmp_path, max_workers=1, max_queue=1, timeout=0.1)
+    finish, thread = hold(control)
+    with pytest.raises(password_hashing.HashingBusy):
+        control.run(lambda: None)
+    assert control.stats()['queue_depth'] == 0
+    finish.set()
+    thread.join()
+
+
+def test_limit_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'hashing.sqlite3')
+    holder = subprocess.Popen([sys.executable, '-c', HOLD_SLOT, path], cwd=ROOT,
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == 'running'
+        control = password_hashing.HashingLimiter(path, max_workers=1, max_queue=0)
+        with pytest.raises(password_hashing.HashingBusy):
+            control.run(lambda: None)
+    finally:
+        holder.kill()
+        holder.wait()
+    # The slot of the killed worker is purged
+    assert control.run(lambda: 'done') == 'done'
+
+
+def test_slots_of_dead_processes_are_purged(tmp_path):
+    control = limiter(tmp_path, max_workers=1, max_queue=0)
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    with control.state.connection() as connection:
+        connection.execute("INSERT INTO slots (running, pid, started) VALUES (1, ?, ?)", (dead.pid, time.time()))
+    assert control.run(lambda: 'done') == 'done'
+
+
+def test_werkzeug_hashes_round_trip(tmp_path):
+    control = limiter(tmp_path)
+    pwhash = control.generate_password_hash('secret', method='pbkdf2:sha256:1000')
+    assert control.check_password_hash(pwhash, 'secret')
+    assert not control.check_password_hash(pwhash, 'wrong')
@@ -0,0 +1,58 @@
+import threading
+import time
+
+import profiler
+import sandbox
+
+
+def busy(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+    return 'done'
+
+
+def test_sampler_flushes_stacks_of_its_thread():
+    flushed = []
+    done = threading.Event()
+    worker = threading.Thread(target=done.wait)
+    worker.start()
+    sampler = profiler.StackSampler(worker.ident, 200, 5, flushed.append)
+    sampler.start()
+    time.sleep(0.2)
+    sampler.stop()
+    done.set()
+    worker.join()
+    stacks = {}
+    for partial in flushed:
+        stacks.update(partial)
+    assert stacks and all('wait' in stack for stack in stacks)
+
+
+def test_sandbox_stacks_are_merged_into_the_active_profile():
+    conversions = sandbox.ConversionSandbox(memory_limit=None, cpu_limit=None, timeout=30)
+    result = {}
+    profile = threading.Thread(target=lambda: result.update(profile=profiler.sample(2, 100)))
+    profile.start()
+    try:
+        while profiler.active() is None:
+            time.sleep(0.01)
+        assert conversions.run(busy, 1.0) == 'done'
+    finally:
+        profile.join()
+        conversions.shutdown()
+
+    stacks, samples = result['profile']
+    merged = [stack for stack in stacks if ';sandbox pid ' in stack]
+    assert merged
+    assert all(stack.startswith('thread MainThread;sandbox pid ') for stack in merged)
+    assert any('busy (test_profiler.py' in stack for stack in merged)
+
+
+def test_no_sampling_without_an_active_profile():
+    assert profiler.active() is None
+    conversions = sandbox.ConversionSandbox(memory_limit=None, cpu_limit=None, timeout=30)
+    try:
+        assert conversions.run(busy, 0.01) == 'done'
+    finally:
+        conversions.shutdown()
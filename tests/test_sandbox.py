@@ -0,0 +1,30 @@
+import pytest
+
+import sandbox
+from app_factory import create_app
+
+
+def app_services(upload_folder):
+    return sandbox.in_worker(), 'autocad_buddy' in create_app({'UPLOAD_FOLDER': upload_folder}).extensions
+
+
+def fail():
+    raise KeyError('missing layer')
+
+
+@pytest.fixture
+def conversions():
+    conversions = sandbox.ConversionSandbox(memory_limit=None, cpu_limit=None, timeout=30)
+    yield conversions
+    conversions.shutdown()
+
+
+def test_apps_built_in_workers_skip_startup(conversions, tmp_path):
+    assert not sandbox.in_worker()
+    assert conversions.run(app_services, str(tmp_path / 'worker')) == (True, False)
+    assert not (tmp_path / 'worker').exists()
+
+
+def test_exceptions_are_raised_in_the_caller(conversions):
+    with pytest.raises(KeyError):
+        conversions.run(fail)
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import shared_state
+
+SCHEMA = ("CREATE TABLE IF NOT EXISTS items (name TEXT PRIMARY KEY)",)
+
+
+class Rejected(Exception):
+    pass
+
+
+def names(state):
+    with state.connection() as connection:
+        return [row[0] for row in connection.execute("SELECT name FROM items ORDER BY name")]
+
+
+def test_rejections_commit_and_errors_roll_back(tmp_path):
+    state = shared_state.SharedState(str(tmp_path / 'state.sqlite3'), SCHEMA)
+    with pytest.raises(Rejected):
+        with state.transaction(Rejected('busy'), commit_on=Rejected) as connection:
+            connection.execute("INSERT INTO items VALUES ('kept')")
+            raise Rejected('full')
+    with pytest.raises(KeyError):
+        with state.transaction(Rejected('busy'), commit_on=Rejected) as connection:
+            connection.execute("INSERT INTO items VALUES ('dropped')")
+            raise KeyError('bug')
+    assert names(state) == ['kept']
+
+
+def test_locked_database_raises_busy(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_state, 'LOCK_TIMEOUT', 0.05)
+    path = str(tmp_path / 'state.sqlite3')
+    holder, other = shared_state.SharedState(path, SCHEMA), shared_state.SharedState(path, SCHEMA)
+    with holder.transaction(Rejected('busy')):
+        with pytest.raises(Rejected, match='busy'):
+            with other.transaction(Rejected('busy')):
+                pass
+
+
+def test_process_alive():
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    assert not shared_state.process_alive(dead.pid)
+    assert shared_state.process_alive(os.getpid())
@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+import pytest
+
+import simplify
+
+
+def circle(radius=100.0, segments=400):
+    """Closed outline of a circle, the first point repeated at the end."""
+    points = [(radius * math.cos(t / segments * 2 * math.pi), radius * math.sin(t / segments * 2 * math.pi))
+              for t in range(segments)]
+    return points + points[:1]
+
+
+def test_zero_tolerance_keeps_every_point():
+    points = circle(segments=50)
+    assert len(simplify.simplify_polyline(points, 0.0)) == 51
+
+
+def test_collinear_points_are_removed():
+    line = [(x, 0.0) for x in range(11)]
+    assert simplify.simplify_polyline(line, 0.01).tolist() == [[0.0, 0.0], [10.0, 0.0]]
+
+
+def test_closed_outline_stays_closed():
+    simplified = simplify.simplify_polyline(circle(), 1.0)
+    assert 3 < len(simplified) < 401
+    assert tuple(simplified[0]) == tuple(simplified[-1])
+
+
+def test_deviation_is_within_tolerance():
+    points = np.array(circle())
+    simplified = simplify.simplify_polyline(points, 0.5)
+    for start, end in zip(simplified, simplified[1:]):
+        first = int(np.flatnonzero((points == start).all(axis=1))[0])
+        last = int(np.flatnonzero((points == end).all(axis=1))[-1])
+        distances = simplify._segment_distances(points[first:last + 1], start, end)
+        assert distances.max() <= 0.5 + 1e-9
+
+
+def test_outlines_within_budget_are_untouched():
+    outlines, tolerance = simplify.simplify_outlines([circle(segments=10)], 0.0, 100)
+    assert tolerance == 0.0
+    assert len(outlines[0]) == 11
+
+
+@pytest.mark.parametrize('budget', [200, 100, 50])
+def test_budget_bisection_finds_a_tight_tolerance(budget):
+    outline = circle()
+    outlines, tolerance = simplify.simplify_outlines([outline], 0.0, budget)
+    assert simplify.wall_triangle_count(outlines[0]) <= budget
+    # Doubling overshoots by up to 2x; bisection must bring the tolerance back
+    # close to the finest one that fits
+    finer = simplify.simplify_polyline(outline, tolerance * (1 - 1 / 32))
+    assert simplify.wall_triangle_count(finer) > budget
+
+
+def test_budget_respects_weights():
+    outlines = [circle(), circle(radius=50.0)]
+    simplified, _ = simplify.simplify_outlines(outlines, 0.0, 150, weights=[2, 1])
+    total = 2 * simplify.wall_triangle_count(simplified[0]) + simplify.wall_triangle_count(simplified[1])
+    assert total <= 150
+
+
+def test_budget_below_minimum_raises():
+    # Every outline keeps its two endpoints, i.e. two wall triangles
+    outlines = [circle(segments=8) for _ in range(10)]
+    with pytest.raises(simplify.TriangleBudgetExceeded):
+        simplify.simplify_outlines(outlines, 0.0, 10)
@@ -0,0 +1,67 @@
+import io
+import math
+import os
+
+import pytest
+
+import simplify
+import svg_simplify
+from app_factory import create_app
+
+svgpathtools = pytest.importorskip('svgpathtools')
+
+
+def write_svg(path, body):
+    path.write_text(f'<svg xmlns="http://www.w3.org/2000/svg" width="200" height="200" viewBox="0 0 200 200">{body}</svg>')
+    return str(path)
+
+
+def wall_triangles(path):
+    paths, _ = svgpathtools.svg2paths(path)
+    return sum(len(subpath) * 2 for p in paths for subpath in p.continuous_subpaths())
+
+
+def test_curves_are_simplified_to_the_budget(tmp_path):
+    source = write_svg(tmp_path / 'in.svg', '<g fill="red"><circle cx="100" cy="100" r="90"/></g>')
+    output = str(tmp_path / 'out.svg')
+    svg_simplify.simplify_svg(source, output, max_triangles=40)
+    assert 0 < wall_triangles(output) <= 40
+    paths, attributes = svgpathtools.svg2paths(output)
+    assert attributes[0]['fill'] == 'red'
+    assert paths[0].isclosed()
+    assert all(math.isclose(abs(point - (100 + 100j)), 90, rel_tol=1e-6) for point in (s.start for s in paths[0]))
+
+
+def test_transforms_are_applied(tmp_path):
+    source = write_svg(tmp_path / 'in.svg', '<g transform="translate(50 0)"><path d="M 0 10 L 20 10"/></g>')
+    output = str(tmp_path / 'out.svg')
+    svg_simplify.simplify_svg(source, output)
+    paths, _ = svgpathtools.svg2paths(output)
+    assert (paths[0].start, paths[0].end) == (50 + 10j, 70 + 10j)
+
+
+def test_unreachable_budget_is_rejected(tmp_path):
+    body = ''.join(f'<path d="M {x} 0 L {x} 10 L {x + 1} 10"/>' for x in range(0, 100, 2))
+    source = write_svg(tmp_path / 'in.svg', body)
+    with pytest.raises(simplify.TriangleBudgetExceeded):
+        svg_simplify.simplify_svg(source, str(tmp_path / 'out.svg'), max_triangles=10)
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app({'UPLOAD_FOLDER': str(tmp_path), 'CONVERT_BURST': 100})
+    client = app.test_client()
+    token = client.post('/api/register', json={'email': 'a@example.com', 'password': 'secret'}).json['access_token']
+    client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {token}"
+    return client
+
+
+def test_svg_uploads_accept_a_tolerance(client, tmp_path):
+    source = write_svg(tmp_path / 'plan.svg', '<circle cx="100" cy="100" r="90"/>')
+    with open(source, 'rb') as f:
+        response = client.post('/api/convert', data={'file': (f, 'plan.svg'), 'tolerance': '0.5'})
+    assert response.status_code == 200
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.simplified.svg')]
+    response = client.post('/api/convert', data={'file': (io.BytesIO(b'\x89PNG\r\n\x1a\n'), 'scan.png'),
+                                                 'tolerance': '0.5'})
+    assert response.json['error'] == 'tolerance is not supported for this file type'
@@ -0,0 +1,120 @@
+import math
+
+import pytest
+
+import triangulate
+
+
+def area(points, triangles):
+    return sum(abs(triangulate._cross(points[a], points[b], points[c])) for a, b, c in triangles) / 2
+
+
+def assert_ccw(points, triangles):
+    for a, b, c in triangles:
+        assert triangulate._cross(points[a], points[b], points[c]) > 0
+
+
+def square(x, y, size):
+    return [(x, y), (x + size, y), (x + size, y + size), (x, y + size)]
+
+
+def test_convex_polygon():
+    points, triangles = triangulate.sweep_triangulate(square(0, 0, 10))
+    assert len(triangles) == 2
+    assert area(points, triangles) == pytest.approx(100)
+    assert_ccw(points, triangles)
+
+
+def test_clockwise_input_is_oriented():
+    points, triangles = triangulate.sweep_triangulate(list(reversed(square(0, 0, 10))))
+    assert area(points, triangles) == pytest.approx(100)
+    assert_ccw(points, triangles)
+
+
+def test_polygon_with_holes():
+    outer = square(0, 0, 100)
+    holes = [square(10, 10, 20), square(60, 50, 30)]
+    points, triangles = triangulate.sweep_triangulate(outer, holes)
+    assert area(points, triangles) == pytest.approx(100 * 100 - 20 * 20 - 30 * 30)
+    # n vertices and h holes give n + 2h - 2 triangles
+    assert len(triangles) == 12 + 2 * 2 - 2
+    assert_ccw(points, triangles)
+
+
+def test_grid_of_holes_sharing_sweep_lines():
+    outer = square(0, 0, 500)
+    holes = [square(50 + i * 100, 50 + j * 100, 40) for i in range(5) for j in range(5)]
+    points, triangles = triangulate.sweep_triangulate(outer, holes)
+    assert area(points, triangles) == pytest.approx(500 * 500 - 25 * 40 * 40)
+
+
+def test_non_monotone_polygon():
+    # Comb shape with split and merge vertices
+    outer = [(0, 0), (10, 0), (10, 10), (8, 10), (8, 2), (6, 2), (6, 10), (4, 10), (4, 2), (2, 2), (2, 10),
+             (0, 10)]
+    points, triangles = triangulate.sweep_triangulate(outer)
+    assert area(points, triangles) == pytest.approx(abs(triangulate.signed_area(outer)))
+    assert_ccw(points, triangles)
+
+
+def test_collinear_points():
+    outer = [(0, 0), (5, 0), (10, 0), (10, 5), (10, 10), (5, 10), (0, 10), (0, 5)]
+    points, triangles = triangulate.triangulate(outer)
+    assert area(points, triangles) == pytest.approx(100)
+    assert all(area(points, [triangle]) > 0 for triangle in triangles)
+
+
+def test_closing_and_duplicate_points():
+    outer = [(0, 0), (10, 0), (10, 0), (10, 10), (0, 10), (0, 0)]
+    points, triangles = triangulate.triangulate(outer)
+    assert area(points, triangles) == pytest.approx(100)
+
+
+def test_circle():
+    outer = [(math.cos(t / 64 * 2 * math.pi), math.sin(t / 64 * 2 * math.pi)) for t in range(64)]
+    points, triangles = triangulate.sweep_triangulate(outer)
+    assert len(triangles) == 62
+    assert area(points, triangles) == pytest.approx(abs(triangulate.signed_area(outer)))
+
+
+# Self-intersecting outlines with a non-zero signed area
+SELF_INTERSECTING = [
+    [(0, 0), (20, 10), (20, 0), (0, 10), (-5, 5)],
+    [(0, 0), (6, 18), (12, 0), (-3, 11), (15, 11)],
+    [(0, 0), (10, 0), (10, 10), (4, 10), (4, -4), (6, -4), (6, 12), (0, 12)],
+]
+
+
+@pytest.mark.parametrize('outer', SELF_INTERSECTING)
+def test_self_intersection_raises_in_sweep(outer):
+    with pytest.raises(triangulate.TriangulationError):
+        triangulate.sweep_triangulate(outer)
+
+
+@pytest.mark.parametrize('outer', SELF_INTERSECTING)
+def test_self_intersection_falls_back_to_ear_clipping(outer):
+    points, triangles = triangulate.triangulate(outer)
+    # Ear clipping always consumes the whole ring: n - 2 triangles
+    assert len(triangles) == len(outer) - 2
+    for a, b, c in triangles:
+        assert triangulate._cross(points[a], points[b], points[c]) >= 0
+
+
+def test_zero_area_outline_is_skipped():
+    bowtie = [(0, 0), (10, 10), (10, 0), (0, 10)]
+    assert triangulate.triangulate(bowtie) == ([], [])
+
+
+def test_ear_clipping_matches_sweep():
+    outer = square(0, 0, 100)
+    holes = [square(10, 10, 20), square(60, 50, 30)]
+    points, triangles = triangulate.ear_clip_triangulate(outer, holes)
+    assert area(points, triangles) == pytest.approx(100 * 100 - 20 * 20 - 30 * 30)
+
+
+def test_triangulate_many_offsets_indices():
+    points, triangles = triangulate.triangulate_many([(square(0, 0, 1), []), (square(5, 5, 2), [])])
+    assert len(points) == 8
+    assert len(triangles) == 4
+    assert area(points, triangles) == pytest.approx(1 + 4)
+    assert max(max(triangle) for triangle in triangles) == 7
@@ -0,0 +1,96 @@
+import io
+import os
+import hashlib
+
+import pytest
+
+import upload_sessions
+
+DIGEST = hashlib.sha256(b'').hexdigest()
+
+
+def create(tmp_path, owner='alice', size=100, **kwargs):
+    return upload_sessions.create_session(str(tmp_path), owner, 'plan.dxf', size, DIGEST, **kwargs)
+
+
+def test_session_count_is_capped_per_owner(tmp_path):
+    for _ in range(2):
+        create(tmp_path, max_sessions=2)
+    with pytest.raises(upload_sessions.UploadSessionError) as rejected:
+        create(tmp_path, max_sessions=2)
+    assert rejected.value.status_code == 429
+    create(tmp_path, owner='bob', max_sessions=2)
+
+
+def test_reserved_bytes_are_capped_per_owner(tmp_path):
+    create(tmp_path, size=600, max_owner_bytes=1000)
+    with pytest.raises(upload_sessions.UploadSessionError) as rejected:
+        create(tmp_path, size=500, max_owner_bytes=1000)
+    assert rejected.value.status_code == 429
+    create(tmp_path, size=400, max_owner_bytes=1000)
+
+
+def test_reserved_bytes_are_capped_for_all_owners(tmp_path):
+    create(tmp_path, owner='alice', size=600, max_total_bytes=1000)
+    with pytest.raises(upload_sessions.UploadSessionError) as rejected:
+        create(tmp_path, owner='bob', size=500, max_total_bytes=1000)
+    assert rejected.value.status_code == 503
+
+
+def test_deleting_a_session_releases_its_reservation(tmp_path):
+    session = create(tmp_path, max_sessions=1)
+    upload_sessions.delete_session(str(tmp_path), session)
+    create(tmp_path, max_sessions=1)
+
+
+def test_sessions_are_only_visible_to_their_owner(tmp_path):
+    session = create(tmp_path)
+    assert upload_sessions.load_session(str(tmp_path), session['id'], 'alice') == session
+    assert upload_sessions.load_session(str(tmp_path), session['id'], 'bob') is None
+
+
+def test_expired_sessions_are_purged_on_session_requests(tmp_path, monkeypatch):
+    upload_folder = str(tmp_path)
+    stale = create(tmp_path)
+    fresh = create(tmp_path)
+    upload_sessions.append_chunk(upload_folder, fresh, 0, io.BytesIO(b''))
+    part = upload_sessions._part_path(upload_folder, stale)
+    old = os.path.getmtime(part) - upload_sessions.SESSION_TTL - 1
+    os.utime(part, (old, old))
+
+    monkeypatch.setitem(upload_sessions._last_purge, upload_folder, 0)
+    assert upload_sessions.load_session(upload_folder, fresh['id'], 'alice') == fresh
+    assert upload_sessions.load_session(upload_folder, stale['id'], 'alice') is None
+    assert not os.path.exists(part)
+
+
+def test_purge_is_throttled(tmp_path):
+    upload_folder = str(tmp_path)
+    session = create(tmp_path)
+    part = upload_sessions._part_path(upload_folder, session)
+    os.remove(part)
+    # The create above scanned moments ago
+    assert upload_sessions.load_session(upload_folder, session['id'], 'alice') == session
+    upload_sessions.purge_expired(upload_folder, force=True)
+    assert upload_sessions.load_session(upload_folder, session['id'], 'alice') is None
+
+
+@pytest.fixture
+def client(tmp_path):
+    from app_factory import create_app
+    app = create_app({'UPLOAD_FOLDER': str(tmp_path), 'MAX_CONTENT_LENGTH': 1024})
+    client = app.test_client()
+    token = client.post('/api/register', json={'email': 'a@example.com', 'password': 'secret'}).json['access_token']
+    client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {token}"
+    return client
+
+
+def test_chunks_need_a_content_length_within_the_limit(client):
+    upload_url = client.post('/api/uploads', json={'filename': 'plan.dxf', 'size': 4096,
+                                                   'sha256': DIGEST}).json['upload_url']
+    headers = {'Upload-Offset': '0'}
+    chunked = {'Upload-Offset': '0', 'Transfer-Encoding': 'chunked'}
+    assert client.put(upload_url, headers=chunked, input_stream=io.BytesIO(b'0\nSECTION\n')).status_code == 411
+    assert client.put(upload_url, headers=headers, data=b'0' * 2048).status_code == 413
+    response = client.put(upload_url, headers=headers, data=b'0\nSECTION\n' + b' ' * 1000)
+    assert response.status_code == 200 and response.json['offset'] == 1010
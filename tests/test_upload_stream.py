@@ -0,0 +1,41 @@
+import io
+import os
+
+import pytest
+
+from app_factory import create_app
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\0' * 64
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app({'UPLOAD_FOLDER': str(tmp_path), 'CONVERT_BURST': 100})
+    client = app.test_client()
+    token = client.post('/api/register', json={'email': 'a@example.com', 'password': 'secret'}).json['access_token']
+    client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {token}"
+    return client
+
+
+def partial_files(folder):
+    return [name for name in os.listdir(folder) if name.startswith('.upload-')]
+
+
+@pytest.mark.parametrize('other', [(b'not a png', 'b.png'), (PNG, 'b.exe')])
+def test_rejected_part_discards_earlier_parts(client, tmp_path, other):
+    response = client.post('/api/convert', data={
+        'file': (io.BytesIO(PNG), 'a.png'),
+        'other': (io.BytesIO(other[0]), other[1])
+    })
+    assert response.status_code in (400, 415)
+    assert partial_files(tmp_path) == []
+
+
+def test_truncated_body_discards_written_parts(client, tmp_path):
+    boundary = 'boundary'
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="a.png"\r\n'
+            f'Content-Type: image/png\r\n\r\n').encode() + PNG + (
+            f'\r\n--{boundary}\r\nContent-Disposition: form-data; name="other"; filename="b.png"\r\n'
+            f'Content-Type: image/png\r\n\r\n').encode() + PNG
+    client.post('/api/convert', data=body, content_type=f'multipart/form-data; boundary={boundary}')
+    assert partial_files(tmp_path) == []
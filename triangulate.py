@@ -0,0 +1,463 @@
+"""
+AutoCad_Buddy - Polygon triangulation
+Triangulates polygons with holes for extrusion caps. Polygons are split into
+y-monotone pieces with a sweep line and each piece is triangulated in linear
+time, giving O(n log n) overall. Inputs the sweep cannot handle (for example
+self-intersecting outlines) fall back to ear clipping.
+"""
+
+import math
+import logging
+
+logger = logging.getLogger('AutoCad_Buddy_API')
+
+# Relative area mismatch above which a sweep result is rejected
+AREA_TOLERANCE = 1e-6
+
+_START, _END, _SPLIT, _MERGE, _REGULAR = range(5)
+
+
+class TriangulationError(ValueError):
+    """Raised when the sweep line cannot triangulate a polygon."""
+
+
+def _cross(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def signed_area(ring):
+    """Signed area of a ring (positive when counter-clockwise)."""
+    total = 0.0
+    for i in range(len(ring)):
+        x1, y1 = ring[i - 1]
+        x2, y2 = ring[i]
+        total += x1 * y2 - x2 * y1
+    return total / 2
+
+
+def point_in_ring(point, ring):
+    """Even-odd test for a point inside a ring."""
+    x, y = point
+    inside = False
+    for i in range(len(ring)):
+        (x1, y1), (x2, y2) = ring[i - 1], ring[i]
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+def _clean_ring(ring):
+    """Drop the closing point and consecutive duplicates of a ring."""
+    cleaned = []
+    for point in ring:
+        point = (float(point[0]), float(point[1]))
+        if not cleaned or point != cleaned[-1]:
+            cleaned.append(point)
+    while len(cleaned) > 1 and cleaned[0] == cleaned[-1]:
+        cleaned.pop()
+    return cleaned
+
+
+def _prepare(outer, holes):
+    """Return (points, rings) with the outer ring counter-clockwise and holes clockwise."""
+    rings = []
+    for index, ring in enumerate([outer] + list(holes or ())):
+        ring = _clean_ring(ring)
+        if len(ring) < 3:
+            continue
+        area = signed_area(ring)
+        if area == 0:
+            continue
+        if (area > 0) != (index == 0):
+            ring.reverse()
+        rings.append(ring)
+    if not rings or signed_area(rings[0]) <= 0:
+        return [], []
+
+    points = []
+    index_rings = []
+    for ring in rings:
+        start = len(points)
+        points.extend(ring)
+        index_rings.append(list(range(start, start + len(ring))))
+    return points, index_rings
+
+
+def _above(p, q):
+    """Sweep order: p is processed before q."""
+    return p[1] > q[1] or (p[1] == q[1] and p[0] < q[0])
+
+
+def _x_at(points, edge, y):
+    (ax, ay), (bx, by) = points[edge[0]], points[edge[1]]
+    if ay == by:
+        return min(ax, bx)
+    return ax + (y - ay) * (bx - ax) / (by - ay)
+
+
+def _edge_slope(points, edge):
+    """Horizontal run per unit of descent, used to order edges that share a point."""
+    (ax, ay), (bx, by) = points[edge[0]], points[edge[1]]
+    if ay == by:
+        return math.inf
+    return (bx - ax) / (ay - by)
+
+
+def _monotone_diagonals(points, rings):
+    """Sweep from top to bottom and return the diagonals that make every face y-monotone."""
+    count = len(points)
+    prev = [0] * count
+    nxt = [0] * count
+    for ring in rings:
+        for i, v in enumerate(ring):
+            prev[v] = ring[i - 1]
+            nxt[v] = ring[(i + 1) % len(ring)]
+
+    kinds = [_REGULAR] * count
+    for v in range(count):
+        p, n = points[prev[v]], points[nxt[v]]
+        here = points[v]
+        convex = _cross(p, here, n) > 0
+        if _above(here, p) and _above(here, n):
+            kinds[v] = _START if convex else _SPLIT
+        elif _above(p, here) and _above(n, here):
+            kinds[v] = _END if convex else _MERGE
+
+    order = sorted(range(count), key=lambda v: (-points[v][1], points[v][0]))
+
+    # Sweep status: edges (upper, lower) with the polygon interior on their right,
+    # kept sorted left to right at the current sweep position.
+    status = []
+    helper = {}
+    diagonals = []
+
+    def locate(edge, y):
+        x = _x_at(points, edge, y)
+        slope = _edge_slope(points, edge)
+        lo, hi = 0, len(status)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            other = status[mid]
+            ox = _x_at(points, other, y)
+            if ox < x or (ox == x and _edge_slope(points, other) < slope):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def insert(edge, y, v):
+        status.insert(locate(edge, y), edge)
+        helper[edge] = v
+
+    def remove(edge, y):
+        index = locate(edge, y)
+        for i in range(max(index - 1, 0), len(status)):
+            if status[i] == edge:
+                del status[i]
+                break
+        else:
+            raise TriangulationError("Sweep status lost an edge")
+        return helper.pop(edge)
+
+    def left_of(v):
+        x, y = points[v]
+        lo, hi = 0, len(status)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _x_at(points, status[mid], y) <= x:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            raise TriangulationError("No edge to the left of a split or merge vertex")
+        return status[lo - 1]
+
+    for v in order:
+        y = points[v][1]
+        kind = kinds[v]
+        out_edge = (v, nxt[v])
+        in_edge = (prev[v], v)
+        if kind == _START:
+            insert(out_edge, y, v)
+        elif kind == _END:
+            h = remove(in_edge, y)
+            if kinds[h] == _MERGE:
+                diagonals.append((v, h))
+        elif kind == _SPLIT:
+            left = left_of(v)
+            diagonals.append((v, helper[left]))
+            helper[left] = v
+            insert(out_edge, y, v)
+        elif kind == _MERGE:
+            h = remove(in_edge, y)
+            if kinds[h] == _MERGE:
+                diagonals.append((v, h))
+            left = left_of(v)
+            if kinds[helper[left]] == _MERGE:
+                diagonals.append((v, helper[left]))
+            helper[left] = v
+        elif _above(points[prev[v]], points[v]):
+            # Interior lies to the right of v
+            h = remove(in_edge, y)
+            if kinds[h] == _MERGE:
+                diagonals.append((v, h))
+            insert(out_edge, y, v)
+        else:
+            left = left_of(v)
+            if kinds[helper[left]] == _MERGE:
+                diagonals.append((v, helper[left]))
+            helper[left] = v
+
+    return nxt, diagonals
+
+
+def _monotone_faces(points, rings, nxt, diagonals):
+    """Trace the faces of the polygon subdivided by the given diagonals."""
+    neighbours = [[] for _ in points]
+    half_edges = []
+    for ring in rings:
+        for v in ring:
+            neighbours[v].append(nxt[v])
+            neighbours[nxt[v]].append(v)
+            half_edges.append((v, nxt[v]))
+    for a, b in set((min(d), max(d)) for d in diagonals):
+        neighbours[a].append(b)
+        neighbours[b].append(a)
+        half_edges.append((a, b))
+        half_edges.append((b, a))
+
+    # Outgoing edges of every vertex sorted counter-clockwise by angle
+    rank = {}
+    for v, adjacent in enumerate(neighbours):
+        vx, vy = points[v]
+        adjacent.sort(key=lambda w: math.atan2(points[w][1] - vy, points[w][0] - vx))
+        for i, w in enumerate(adjacent):
+            rank[(v, w)] = i
+
+    faces = []
+    visited = set()
+    for start in half_edges:
+        if start in visited:
+            continue
+        face = []
+        edge = start
+        while edge not in visited:
+            visited.add(edge)
+            u, v = edge
+            face.append(u)
+            # Next edge around the face is the one immediately clockwise from v->u
+            adjacent = neighbours[v]
+            edge = (v, adjacent[rank[(v, u)] - 1])
+        if edge != start:
+            raise TriangulationError("Diagonals do not form closed faces")
+        faces.append(face)
+    return faces
+
+
+def _triangulate_monotone(points, face):
+    """Triangulate a y-monotone face given as a counter-clockwise list of vertex indices."""
+    if len(face) == 3:
+        return [tuple(face)]
+
+    size = len(face)
+    key = lambda i: (-points[face[i]][1], points[face[i]][0])
+    top = min(range(size), key=key)
+    bottom = max(range(size), key=key)
+
+    # Walking counter-clockwise from the top vertex descends the left chain
+    left_chain = set()
+    i = top
+    while i != bottom:
+        left_chain.add(face[i])
+        i = (i + 1) % size
+    ordered = sorted(face, key=lambda v: (-points[v][1], points[v][0]))
+
+    triangles = []
+    stack = [ordered[0], ordered[1]]
+    for j in range(2, size - 1):
+        v = ordered[j]
+        on_left = v in left_chain
+        if on_left != (stack[-1] in left_chain):
+            while len(stack) > 1:
+                a = stack.pop()
+                b = stack[-1]
+                triangles.append((v, a, b) if on_left else (v, b, a))
+            stack = [ordered[j - 1], v]
+        else:
+            last = stack.pop()
+            while stack:
+                turn = _cross(points[v], points[last], points[stack[-1]])
+                if (turn >= 0) if on_left else (turn <= 0):
+                    break
+                triangles.append((v, last, stack[-1]) if on_left else (v, stack[-1], last))
+                last = stack.pop()
+            stack.append(last)
+            stack.append(v)
+    v = ordered[-1]
+    while len(stack) > 1:
+        a = stack.pop()
+        b = stack[-1]
+        triangles.append((v, a, b) if a in left_chain else (v, b, a))
+    return triangles
+
+
+def _orient_ccw(points, triangles):
+    oriented = []
+    for a, b, c in triangles:
+        if _cross(points[a], points[b], points[c]) < 0:
+            b, c = c, b
+        oriented.append((a, b, c))
+    return oriented
+
+
+def _triangles_area(points, triangles):
+    return sum(abs(_cross(points[a], points[b], points[c])) for a, b, c in triangles) / 2
+
+
+def sweep_triangulate(outer, holes=None):
+    """
+    Triangulate a polygon with holes by monotone decomposition.
+
+    Returns (points, triangles) where triangles are counter-clockwise index
+    triples into points. Raises TriangulationError when the input is not a
+    simple polygon.
+    """
+    points, rings = _prepare(outer, holes)
+    if not rings:
+        return points, []
+    nxt, diagonals = _monotone_diagonals(points, rings)
+    triangles = []
+    for face in _monotone_faces(points, rings, nxt, diagonals):
+        if len(face) < 3:
+            raise TriangulationError("Degenerate face")
+        triangles.extend(_triangulate_monotone(points, face))
+    triangles = _orient_ccw(points, triangles)
+
+    expected = sum(abs(signed_area([points[v] for v in ring])) * (1 if i == 0 else -1)
+                   for i, ring in enumerate(rings))
+    actual = _triangles_area(points, triangles)
+    expected_count = len(points) + 2 * (len(rings) - 1) - 2
+    if len(triangles) != expected_count or abs(actual - expected) > AREA_TOLERANCE * max(abs(expected), 1e-12):
+        raise TriangulationError("Triangulation does not cover the polygon")
+    return points, triangles
+
+
+def _point_in_triangle(p, a, b, c):
+    return _cross(a, b, p) >= 0 and _cross(b, c, p) >= 0 and _cross(c, a, p) >= 0
+
+
+def _on_open_segment(p, a, b):
+    if p == a or p == b or _cross(a, b, p) != 0:
+        return False
+    return min(a[0], b[0]) <= p[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= p[1] <= max(a[1], b[1])
+
+
+def _segment_blocked(p1, p2, q1, q2):
+    """True if segment p1-p2 crosses q1-q2 or passes through one of its endpoints."""
+    if _on_open_segment(q1, p1, p2) or _on_open_segment(q2, p1, p2):
+        return True
+    d1 = _cross(q1, q2, p1)
+    d2 = _cross(q1, q2, p2)
+    d3 = _cross(p1, p2, q1)
+    d4 = _cross(p1, p2, q2)
+    return d1 * d2 < 0 and d3 * d4 < 0
+
+
+def _in_wedge(a, b, c, p):
+    """True if p lies inside the interior angle a-b-c of a counter-clockwise ring."""
+    if _cross(a, b, c) >= 0:
+        return _cross(a, b, p) > 0 and _cross(b, c, p) > 0
+    return _cross(a, b, p) > 0 or _cross(b, c, p) > 0
+
+
+def _bridge_holes(points, rings):
+    """Merge holes into the outer ring with bridge edges, rightmost hole first."""
+    ring = list(rings[0])
+    holes = sorted(rings[1:], key=lambda hole: -max(points[v][0] for v in hole))
+    for hole in holes:
+        start = max(range(len(hole)), key=lambda i: points[hole[i]][0])
+        hole_point = points[hole[start]]
+        edges = [(ring[i - 1], ring[i]) for i in range(len(ring))]
+        for other in holes:
+            edges.extend((other[i - 1], other[i]) for i in range(len(other)))
+        size = len(ring)
+        by_distance = sorted(range(size), key=lambda i: (points[ring[i]][0] - hole_point[0]) ** 2
+                             + (points[ring[i]][1] - hole_point[1]) ** 2)
+        best = by_distance[0]
+        for i in by_distance:
+            candidate = points[ring[i]]
+            # A vertex can appear several times once bridges exist; only the copy
+            # whose interior angle faces the hole is a valid bridge end
+            if not _in_wedge(points[ring[i - 1]], candidate, points[ring[(i + 1) % size]], hole_point):
+                continue
+            if any(_segment_blocked(hole_point, candidate, points[a], points[b]) for a, b in edges):
+                continue
+            best = i
+            break
+        cycle = hole[start:] + hole[:start]
+        ring = ring[:best + 1] + cycle + [cycle[0], ring[best]] + ring[best + 1:]
+    return ring
+
+
+def ear_clip_triangulate(outer, holes=None):
+    """
+    Triangulate a polygon with holes by ear clipping (O(n^2)).
+
+    Always terminates: when no valid ear is left, as happens on
+    self-intersecting input, the next vertex is clipped regardless.
+    """
+    points, rings = _prepare(outer, holes)
+    if not rings:
+        return points, []
+    ring = _bridge_holes(points, rings) if len(rings) > 1 else list(rings[0])
+
+    triangles = []
+    stalled = 0
+    i = 0
+    while len(ring) > 3:
+        size = len(ring)
+        a, b, c = ring[(i - 1) % size], ring[i % size], ring[(i + 1) % size]
+        pa, pb, pc = points[a], points[b], points[c]
+        is_ear = _cross(pa, pb, pc) > 0
+        if is_ear:
+            for v in ring:
+                if v in (a, b, c) or points[v] in (pa, pb, pc):
+                    continue
+                if _point_in_triangle(points[v], pa, pb, pc):
+                    is_ear = False
+                    break
+        if is_ear or stalled >= size:
+            triangles.append((a, b, c))
+            del ring[i % size]
+            stalled = 0
+        else:
+            i += 1
+            stalled += 1
+    triangles.append(tuple(ring))
+    return points, _orient_ccw(points, triangles)
+
+
+def triangulate(outer, holes=None):
+    """Triangulate a polygon with holes, falling back to ear clipping on invalid input."""
+    try:
+        return sweep_triangulate(outer, holes)
+    except (TriangulationError, KeyError, IndexError) as e:
+        logger.debug(f"Sweep triangulation failed ({e}), falling back to ear clipping")
+        return ear_clip_triangulate(outer, holes)
+
+
+def triangulate_many(polygons):
+    """
+    Triangulate a batch of (outer, holes) polygons.
+
+    Returns (points, triangles) with all polygons sharing one point list so the
+    result can be appended to a mesh in a single step.
+    """
+    all_points = []
+    all_triangles = []
+    for outer, holes in polygons:
+        points, triangles = triangulate(outer, holes)
+        offset = len(all_points)
+        all_points.extend(points)
+        all_triangles.extend((a + offset, b + offset, c + offset) for a, b, c in triangles)
+    return all_points, all_triangles
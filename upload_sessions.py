@@ -0,0 +1,264 @@
+"""
+AutoCad_Buddy - Resumable chunked uploads
+Upload sessions let large drawings arrive in several requests. Each chunk is
+appended to a partial file on disk straight from the request stream, so the
+per-request size limit applies per chunk rather than per file. Session state
+lives next to the partial file, so chunks may be served by any worker.
+Each open session reserves its declared size, so the number of sessions and
+reserved bytes are capped per user and for the host; abandoned sessions
+expire.
+"""
+
+import os
+import json
+import time
+import uuid
+import fcntl
+import hashlib
+import logging
+
+import upload_stream
+
+logger = logging.getLogger('AutoCad_Buddy_API')
+
+# Subdirectory of the upload folder holding session state and partial files,
+# one directory per owner
+SESSION_DIR = 'sessions'
+# Sessions untouched for this long are removed
+SESSION_TTL = 24 * 60 * 60
+# Seconds between scans for expired sessions, per process
+PURGE_INTERVAL = 60
+# Open sessions and declared bytes allowed per owner, and declared bytes for all owners
+MAX_SESSIONS_PER_OWNER = 4
+MAX_RESERVED_BYTES_PER_OWNER = 2 * 1024 ** 3
+MAX_RESERVED_BYTES = 20 * 1024 ** 3
+COPY_BUFFER_SIZE = 64 * 1024
+
+_last_purge = {}
+
+
+class UploadSessionError(Exception):
+    """Raised for upload session requests that cannot be served."""
+
+    def __init__(self, message, status_code=400, offset=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.offset = offset
+
+
+def _session_dir(upload_folder):
+    directory = os.path.join(upload_folder, SESSION_DIR)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _owner_dir(upload_folder, owner):
+    name = hashlib.blake2b(owner.encode('utf-8'), digest_size=16).hexdigest()
+    directory = os.path.join(_session_dir(upload_folder), name)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _meta_path(upload_folder, owner, upload_id):
+    return os.path.join(_owner_dir(upload_folder, owner), f"{upload_id}.json")
+
+
+def _part_path(upload_folder, session):
+    return os.path.join(_owner_dir(upload_folder, session["owner"]), f"{session['id']}.part")
+
+
+def _remove(directory, upload_id):
+    for suffix in ('.json', '.part'):
+        try:
+            os.remove(os.path.join(directory, upload_id + suffix))
+        except FileNotFoundError:
+            pass
+
+
+def _owner_sessions(directory):
+    """Metadata of the sessions stored in an owner directory."""
+    sessions = []
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                sessions.append(json.load(f))
+        except (ValueError, FileNotFoundError):
+            continue
+    return sessions
+
+
+def purge_expired(upload_folder, ttl=SESSION_TTL, force=False):
+    """
+    Delete sessions whose partial file has not been written to within ttl seconds.
+
+    Called on every session request; unless forced, the scan runs at most
+    once per PURGE_INTERVAL in each process.
+    """
+    now = time.time()
+    if not force and now - _last_purge.get(upload_folder, 0) < PURGE_INTERVAL:
+        return
+    _last_purge[upload_folder] = now
+    cutoff = now - ttl
+    for entry in os.scandir(_session_dir(upload_folder)):
+        if not entry.is_dir():
+            continue
+        for name in os.listdir(entry.path):
+            if not name.endswith('.json'):
+                continue
+            upload_id = name[:-len('.json')]
+            try:
+                expired = os.path.getmtime(os.path.join(entry.path, f"{upload_id}.part")) < cutoff
+            except FileNotFoundError:
+                expired = True
+            if expired:
+                _remove(entry.path, upload_id)
+
+
+def create_session(upload_folder, owner, filename, size, sha256,
+                   max_sessions=MAX_SESSIONS_PER_OWNER,
+                   max_owner_bytes=MAX_RESERVED_BYTES_PER_OWNER,
+                   max_total_bytes=MAX_RESERVED_BYTES):
+    """
+    Start an upload session and return its metadata.
+
+    The declared size is reserved until the session is finalized, deleted or
+    expires: an owner may hold max_sessions sessions and max_owner_bytes
+    declared bytes, and all owners together max_total_bytes.
+    """
+    if not isinstance(sha256, str) or len(sha256) != 64 or not all(c in '0123456789abcdefABCDEF' for c in sha256):
+        raise UploadSessionError("sha256 must be a hex-encoded SHA-256 digest")
+    purge_expired(upload_folder)
+    directory = _owner_dir(upload_folder, owner)
+    with open(os.path.join(_session_dir(upload_folder), '.lock'), 'w') as lock:
+        # Serializes the quota check and the new session across workers
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        owned = _owner_sessions(directory)
+        if len(owned) >= max_sessions:
+            raise UploadSessionError(
+                f"Too many open uploads; finish or delete one of your {len(owned)} uploads first", 429)
+        if sum(s["size"] for s in owned) + size > max_owner_bytes:
+            raise UploadSessionError(
+                f"Open uploads would exceed {max_owner_bytes} reserved bytes per user", 429)
+        total = size
+        for entry in os.scandir(_session_dir(upload_folder)):
+            if entry.is_dir():
+                total += sum(s["size"] for s in _owner_sessions(entry.path))
+        if total > max_total_bytes:
+            raise UploadSessionError("Upload storage is full, try again later", 503)
+
+        upload_id = str(uuid.uuid4())
+        session = {
+            "id": upload_id,
+            "owner": owner,
+            "filename": filename,
+            "size": size,
+            "sha256": sha256.lower(),
+            "created_at": time.time()
+        }
+        open(_part_path(upload_folder, session), 'wb').close()
+        with open(_meta_path(upload_folder, owner, upload_id), 'w') as f:
+            json.dump(session, f)
+    return session
+
+
+def load_session(upload_folder, upload_id, owner):
+    """Return the metadata of an upload session owned by owner, or None."""
+    purge_expired(upload_folder)
+    try:
+        uuid.UUID(upload_id)
+        with open(_meta_path(upload_folder, owner, upload_id)) as f:
+            session = json.load(f)
+    except (ValueError, FileNotFoundError):
+        return None
+    if session["owner"] != owner:
+        return None
+    return session
+
+
+def current_offset(upload_folder, session):
+    """Number of bytes received so far."""
+    return os.path.getsize(_part_path(upload_folder, session))
+
+
+def append_chunk(upload_folder, session, offset, stream):
+    """
+    Append the body of a chunk request at offset and return the new offset.
+
+    The offset must match the bytes already received, so a client that lost
+    a response can ask for the current offset and resume from there.
+    """
+    part_path = _part_path(upload_folder, session)
+    with open(part_path, 'r+b') as f:
+        # Serializes concurrent chunks for the same session across workers
+        fcntl.flock(f, fcntl.LOCK_EX)
+        received = f.seek(0, os.SEEK_END)
+        if offset != received:
+            raise UploadSessionError(f"Expected offset {received}", 409, offset=received)
+
+        written = received
+        try:
+            for chunk in iter(lambda: stream.read(COPY_BUFFER_SIZE), b''):
+                if written + len(chunk) > session["size"]:
+                    f.truncate(received)
+                    raise UploadSessionError("Chunk extends past the declared file size", 413, offset=received)
+                f.write(chunk)
+                written += len(chunk)
+        finally:
+            # Whatever arrived before a dropped connection is kept for resuming
+            f.flush()
+
+        sniff_at = min(upload_stream.SNIFF_BYTES, session["size"])
+        if received < sniff_at <= written:
+            f.seek(0)
+            _check_format(upload_folder, session, f.read(sniff_at))
+    return written
+
+
+def _check_format(upload_folder, session, head):
+    expected = upload_stream.normalize_format(session["filename"].rsplit('.', 1)[-1])
+    detected = upload_stream.sniff_format(head)
+    if detected != expected:
+        delete_session(upload_folder, session)
+        raise UploadSessionError(
+            f"File content ({detected or 'unknown'}) does not match its extension ({expected})", 415
+        )
+
+
+def finalize_session(upload_folder, session, destination):
+    """Verify the complete upload and move it to destination. Returns (size, sha256)."""
+    part_path = _part_path(upload_folder, session)
+    try:
+        f = open(part_path, 'rb')
+    except FileNotFoundError:
+        raise UploadSessionError("Upload not found", 404)
+    with f:
+        # Waits for an in-flight chunk of the same session to finish
+        fcntl.flock(f, fcntl.LOCK_EX)
+        size = os.fstat(f.fileno()).st_size
+        if size != session["size"]:
+            raise UploadSessionError(f"Upload incomplete: {size} of {session['size']} bytes", 409, offset=size)
+
+        digest = hashlib.sha256()
+        head = f.read(upload_stream.SNIFF_BYTES)
+        digest.update(head)
+        for chunk in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+            digest.update(chunk)
+        if digest.hexdigest() != session["sha256"]:
+            delete_session(upload_folder, session)
+            raise UploadSessionError("SHA-256 of the uploaded file does not match", 422)
+        _check_format(upload_folder, session, head)
+
+        try:
+            os.replace(part_path, destination)
+        except FileNotFoundError:
+            # Finalized concurrently by another request
+            raise UploadSessionError("Upload not found", 404)
+    delete_session(upload_folder, session)
+    return size, session["sha256"]
+
+
+def delete_session(upload_folder, session):
+    """Remove an upload session and its partial file, releasing its reservation."""
+    _remove(_owner_dir(upload_folder, session["owner"]), session["id"])
@@ -0,0 +1,225 @@
+"""
+AutoCad_Buddy - Streaming upload validation
+Multipart file parts are written straight into the upload folder while they
+are parsed. The first bytes are sniffed for the real file type, and the
+content is hashed and size-counted on the fly, so mismatched or oversized
+uploads are aborted mid-stream before any conversion work is done.
+"""
+
+import os
+import re
+import uuid
+import hashlib
+import logging
+
+from flask import Request, current_app
+
+try:
+    import magic
+except ImportError:  # libmagic missing on the host; built-in signatures still apply
+    magic = None
+
+logger = logging.getLogger('AutoCad_Buddy_API')
+
+# Bytes buffered before the file type is decided
+SNIFF_BYTES = 4096
+
+# Extensions that share a file format
+_FORMAT_ALIASES = {'jpeg': 'jpg'}
+
+# MIME types reported by libmagic for each supported format
+_MIME_FORMATS = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'application/pdf': 'pdf',
+    'image/svg+xml': 'svg',
+    'image/vnd.dwg': 'dwg',
+    'application/acad': 'dwg',
+    'image/vnd.dxf': 'dxf',
+}
+
+_DXF_TEXT = re.compile(rb'^(\xef\xbb\xbf)?\s*(0\s*\r?\n\s*SECTION|999\s*\r?\n)')
+_SVG_TEXT = re.compile(rb'<svg[\s>]')
+
+
+class UploadRejected(Exception):
+    """Raised while streaming an upload that must not be stored."""
+
+    def __init__(self, message, status_code=415):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def normalize_format(extension):
+    extension = extension.lower()
+    return _FORMAT_ALIASES.get(extension, extension)
+
+
+def sniff_format(head):
+    """Detect the file format from its first bytes, or return None."""
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if head.startswith(b'%PDF-'):
+        return 'pdf'
+    if re.match(rb'AC10\d\d', head):
+        return 'dwg'
+    if head.startswith(b'AutoCAD Binary DXF') or _DXF_TEXT.match(head):
+        return 'dxf'
+    if _SVG_TEXT.search(head):
+        return 'svg'
+    if magic is not None:
+        return _MIME_FORMATS.get(magic.from_buffer(head, mime=True))
+    return None
+
+
+class ValidatingUpload:
+    """
+    Writable file object used as the multipart container for one uploaded file.
+
+    Data is written to a temporary file inside the upload folder. Call
+    finalize() to move it into place; otherwise it is deleted on close().
+    """
+
+    def __init__(self, directory, expected_format, max_size):
+        self.expected_format = expected_format
+        self.max_size = max_size
+        self.path = os.path.join(directory, f".upload-{uuid.uuid4().hex}.part")
+        self.size = 0
+        self.detected_format = None
+        self._hash = hashlib.sha256()
+        self._head = b''
+        self._file = open(self.path, 'w+b')
+        self._finalized = False
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    def _check_head(self, final=False):
+        if len(self._head) < SNIFF_BYTES and not final:
+            return
+        self.detected_format = sniff_format(self._head)
+        if self.detected_format != self.expected_format:
+            detected = self.detected_format or 'unknown'
+            raise UploadRejected(
+                f"File content ({detected}) does not match its extension ({self.expected_format})"
+            )
+        self._file.write(self._head)
+        self._head = None
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            self._discard()
+            raise UploadRejected(f"File exceeds the maximum upload size of {self.max_size} bytes", 413)
+        self._hash.update(data)
+        if self._head is None:
+            return self._file.write(data)
+        self._head += data
+        try:
+            self._check_head()
+        except UploadRejected:
+            self._discard()
+            raise
+        return len(data)
+
+    def seek(self, offset, whence=0):
+        # The parser rewinds the container once the part is complete
+        if self._head is not None:
+            try:
+                self._check_head(final=True)
+            except UploadRejected:
+                self._discard()
+                raise
+        return self._file.seek(offset, whence)
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def readline(self, size=-1):
+        return self._file.readline(size)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    def finalize(self, destination):
+        """Move the validated upload to its final path."""
+        self._file.close()
+        os.replace(self.path, destination)
+        self.path = destination
+        self._finalized = True
+        return destination
+
+    def _discard(self):
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        if not self._finalized:
+            self._discard()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+
+class StreamingUploadRequest(Request):
+    """
+    Request class that streams file uploads through ValidatingUpload.
+
+    Every container is recorded when it is created, so close() (called on
+    request teardown) discards the ones that were not finalized, including
+    parts written before parsing failed and never reached request.files.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Containers created while parsing, finalized or not
+        self._uploads = []
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not filename:
+            # Empty file input; left to the route to report
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        extension = filename.rsplit('.', 1)[1] if '.' in filename else ''
+        config = current_app.config
+        if normalize_format(extension) not in {normalize_format(e) for e in config['ALLOWED_EXTENSIONS']}:
+            # Rejected later by allowed_file(); avoid buffering the content at all
+            raise UploadRejected("File type not allowed", 400)
+        upload = ValidatingUpload(
+            config['UPLOAD_FOLDER'],
+            normalize_format(extension),
+            config.get('MAX_CONTENT_LENGTH')
+        )
+        self._uploads.append(upload)
+        return upload
+
+    def close(self):
+        super().close()
+        for upload in self._uploads:
+            upload.close()
+
+
+def save(file, destination):
+    """Store an uploaded FileStorage at destination and return (size, sha256)."""
+    stream = file.stream
+    if isinstance(stream, ValidatingUpload):
+        stream.finalize(destination)
+        return stream.size, stream.sha256
+
+    # Uploads that did not go through the streaming request class
+    digest = hashlib.sha256()
+    size = 0
+    with open(destination, 'wb') as f:
+        for chunk in iter(lambda: stream.read(64 * 1024), b''):
+            digest.update(chunk)
+            size += len(chunk)
+            f.write(chunk)
+    return size, digest.hexdigest()